@@ -0,0 +1,119 @@
+#!/usr/bin/env python3
+"""
+Memory and allocation benchmark of the value objects of the communication package.
+
+Run from the mesa directory with: python -m benchmarks.memory [nb_items]
+
+Each value object is compared with a reference class holding the same attributes in a __dict__, as the value
+objects did before they declared __slots__.
+"""
+
+import sys
+import tracemalloc
+import weakref
+
+from communication.arguments.Argument import Argument
+from communication.arguments.CoupleValue import CoupleValue
+from communication.message.Message import Message
+from communication.message.MessagePerformative import MessagePerformative
+from communication.preferences.CriterionName import CriterionName
+from communication.preferences.CriterionValue import CriterionValue
+from communication.preferences.Item import Item
+from communication.preferences.Value import Value
+
+
+class _DictItem:
+    """ Item keeping its attributes in a __dict__.
+    """
+    def __init__(self, name, description, item_id=None):
+        self.name = name
+        self.description = description
+        self.id = item_id
+
+
+class _DictCriterionValue:
+    """ CriterionValue keeping its attributes in a __dict__.
+    """
+    def __init__(self, item, criterion_name, value):
+        self.item = item
+        self.criterion_name = criterion_name
+        self.value = value
+
+
+class _DictMessage:
+    """ Message keeping its attributes in a __dict__.
+    """
+    def __init__(self, from_agent, to_agent, message_performative, content):
+        self.from_agent = from_agent
+        self.to_agent = to_agent
+        self.message_performative = message_performative
+        self.content = content
+
+
+class _DictArgument:
+    """ Argument keeping its attributes in a __dict__, interned in the same way.
+    """
+    instances = weakref.WeakValueDictionary()
+
+    def __new__(cls, boolean_decision, item, couple_value, comparison=None):
+        key = (boolean_decision, item, couple_value, comparison)
+        argument = _DictArgument.instances.get(key)
+        if argument is None:
+            argument = super().__new__(cls)
+            argument.decision = boolean_decision
+            argument.item = item
+            argument.couple_value = couple_value
+            argument.comparison = comparison
+            argument.key = key
+            _DictArgument.instances[key] = argument
+        return argument
+
+
+def measure(build):
+    """ Return the memory (bytes) and the number of memory blocks held by the objects build() returns.
+    """
+    tracemalloc.start()
+    before = tracemalloc.take_snapshot()
+    objects = build()
+    after = tracemalloc.take_snapshot()
+    tracemalloc.stop()
+    statistics = after.compare_to(before, "filename")
+    size = sum(statistic.size_diff for statistic in statistics)
+    count = sum(statistic.count_diff for statistic in statistics)
+    del objects
+    return size, count
+
+
+def run(nb_items):
+    """ Measure the value objects created for a catalog of nb_items items and return a dict of results.
+    """
+    items = [Item("Item{}".format(i), "Some random item") for i in range(nb_items)]
+    criterion_names = list(CriterionName)
+    values = list(Value)
+    def builders(item_class, criterion_value_class, message_class, argument_class):
+        return {
+            "Item": lambda: [item_class("Item{}".format(i), "Some random item") for i in range(nb_items)],
+            "CriterionValue": lambda: [criterion_value_class(item, criterion_name, values[i % len(values)])
+                                       for i, item in enumerate(items) for criterion_name in criterion_names],
+            "Message": lambda: [message_class("agent1", "agent2", MessagePerformative.PROPOSE, item)
+                                for item in items],
+            "Argument": lambda: [argument_class(True, item, CoupleValue(CriterionName.NOISE, Value.GOOD))
+                                 for item in items],
+        }
+    reference_builders = builders(_DictItem, _DictCriterionValue, _DictMessage, _DictArgument)
+    results = {}
+    for name, build in builders(Item, CriterionValue, Message, Argument).items():
+        size, count = measure(build)
+        reference_size, reference_count = measure(reference_builders[name])
+        results[name] = {"bytes": size, "blocks": count,
+                         "reference_bytes": reference_size, "reference_blocks": reference_count}
+    return results
+
+
+if __name__ == "__main__":
+    nb_items = int(sys.argv[1]) if len(sys.argv) > 1 else 100000
+    print("Memory held by value objects for {0} items, with __dict__ -> with __slots__".format(nb_items))
+    for name, result in run(nb_items).items():
+        print("{0:<16} {1:>12,} -> {2:>12,} bytes ({3:+.1%}) {4:>10,} -> {5:>10,} blocks".format(
+            name, result["reference_bytes"], result["bytes"], result["bytes"] / result["reference_bytes"] - 1,
+            result["reference_blocks"], result["blocks"]))
@@ -0,0 +1,220 @@
+#!/usr/bin/env python3
+"""
+Throughput and scaling benchmarks of the negotiation, with fixed seeds.
+
+Run from the mesa directory with: python -m benchmarks.suite [--full] [--baseline FILE] [--save-baseline FILE]
+
+Every benchmark reports the best time of its repeats and the peak memory of one more traced run.
+When a baseline is given, benchmarks slower than the baseline by more than the threshold are reported
+as regressions and the exit status is 1.
+"""
+
+import argparse
+import json
+import random
+import sys
+import time
+import tracemalloc
+
+from communication.agent.CommunicatingAgent import CommunicatingAgent
+from communication.mailbox.CountsOnlyRetentionPolicy import CountsOnlyRetentionPolicy
+from communication.mailbox.Mailbox import Mailbox
+from communication.message.Message import Message
+from communication.message.MessagePerformative import MessagePerformative
+from communication.message.MessageService import MessageService
+from pw_argumentation import ArgumentModel
+
+
+SEED = 42
+NB_ITEMS = [10, 100, 1000]
+FULL_NB_ITEMS = NB_ITEMS + [10000, 100000]
+
+
+def measure(function, repeats):
+    """ Call function repeats times, then once more under tracemalloc.
+    Return the best duration (s), the value returned by the last timed call and the traced peak memory (bytes).
+    """
+    best_duration = None
+    result = None
+    for _ in range(repeats):
+        start = time.perf_counter()
+        result = function()
+        duration = time.perf_counter() - start
+        best_duration = duration if best_duration is None else min(best_duration, duration)
+    tracemalloc.start()
+    function()
+    _, peak_memory = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return best_duration, result, peak_memory
+
+
+def negotiation(nb_items):
+    """ Return a function running a full negotiation, which returns its numbers of steps and messages.
+    """
+    def run():
+        model = ArgumentModel(nb_items, seed=SEED)
+        model.run()
+        return model.step_index, MessageService.get_instance(model).get_sent_count()
+    return run
+
+
+def negotiated_model(nb_items):
+    """ Return a model whose negotiation has run to the end, to benchmark queries on its agents.
+    """
+    model = ArgumentModel(nb_items, seed=SEED)
+    model.run()
+    return model
+
+
+def preferences_benchmarks(nb_items, nb_calls):
+    """ Return the micro benchmarks of the Preferences queries used by the agents.
+    """
+    model = negotiated_model(nb_items)
+    agent = model.agent1
+    items = agent.preference.get_items()
+    rng = random.Random(SEED)
+    sample = [rng.choice(items) for _ in range(nb_calls)]
+    arguments = [agent.preference.support_proposal(item) for item in sample]
+    arguments = [argument for argument in arguments if argument is not None]
+    all_items = set(items)
+
+    def most_preferred():
+        for _ in range(nb_calls):
+            agent.preference.most_preferred(items)
+        return nb_calls
+
+    def is_item_among_top_percent_of_all():
+        # A single call is too fast to be timed reliably, so the sample is checked 100 times
+        for _ in range(100):
+            for item in sample:
+                agent.preference.is_item_among_top_percent_of_all(item, 10)
+        return 100 * nb_calls
+
+    def get_attacking_arguments():
+        for argument in arguments:
+            agent.preference.get_attacking_arguments(all_items, argument)
+        return len(arguments)
+
+    return {"most_preferred": most_preferred,
+            "is_item_among_top_percent_of_all": is_item_among_top_percent_of_all,
+            "get_attacking_arguments": get_attacking_arguments}
+
+
+def mailbox_benchmarks(nb_messages):
+    """ Return the micro benchmarks of the Mailbox: receiving, reading and querying messages.
+    """
+    performatives = list(MessagePerformative)
+    rng = random.Random(SEED)
+    messages = [Message("agent{}".format(rng.randrange(10)), "agent", rng.choice(performatives), i)
+                for i in range(nb_messages)]
+
+    def receive_and_read():
+        mailbox = Mailbox()
+        for message in messages:
+            mailbox.receive_messages(message)
+            mailbox.get_new_messages()
+        return nb_messages
+
+    mailbox = Mailbox()
+    mailbox.receive_message_batch(messages)
+
+    def query():
+        for i in range(nb_messages):
+            len(mailbox.get_messages_from_performative(performatives[i % len(performatives)]))
+            len(mailbox.get_messages_from_exp("agent{}".format(i % 10)))
+        return nb_messages
+
+    return {"mailbox_receive_and_read": receive_and_read, "mailbox_query": query}
+
+
+def dispatch_benchmark(nb_messages, nb_agents=100):
+    """ Return the micro benchmark of the deferred dispatch of messages between many agents.
+    """
+    model = ArgumentModel(0, seed=SEED)
+    message_service = MessageService.get_instance(model)
+    message_service.set_instant_delivery(False)
+    # Sinks drop what they read, so that every repeat does the same work
+    agents = [model.agent1] + [_SinkAgent(1000 + i, model, "sink{}".format(i),
+                                          retention_policy=CountsOnlyRetentionPolicy()) for i in range(nb_agents)]
+    rng = random.Random(SEED)
+    messages = [Message("agent1", agents[rng.randrange(1, len(agents))].get_name(),
+                        MessagePerformative.PROPOSE, i) for i in range(nb_messages)]
+
+    def dispatch():
+        for message in messages:
+            message_service.send_message(message)
+        message_service.dispatch_messages()
+        for agent in agents:
+            agent.get_new_messages()
+        return nb_messages
+
+    return {"message_service_dispatch": dispatch}
+
+
+class _SinkAgent(CommunicatingAgent):
+    """ Agent which only receives messages, as the recipients of the dispatch benchmark.
+    """
+    pass
+
+
+def run(nb_items_list, repeats):
+    """ Run every benchmark and return their results, by benchmark name.
+    """
+    results = {}
+    for nb_items in nb_items_list:
+        duration, (steps, messages), peak_memory = measure(negotiation(nb_items), repeats)
+        results["negotiation_{}".format(nb_items)] = {"seconds": duration,
+                                                      "steps_per_second": steps / duration,
+                                                      "messages_per_second": messages / duration,
+                                                      "peak_memory": peak_memory}
+    micro_benchmarks = {}
+    micro_benchmarks.update(preferences_benchmarks(1000, 1000))
+    micro_benchmarks.update(mailbox_benchmarks(100000))
+    micro_benchmarks.update(dispatch_benchmark(100000))
+    for name, function in micro_benchmarks.items():
+        duration, nb_operations, peak_memory = measure(function, repeats)
+        results[name] = {"seconds": duration,
+                         "operations_per_second": nb_operations / duration,
+                         "peak_memory": peak_memory}
+    return results
+
+
+def compare(results, baseline, threshold):
+    """ Return the names of the benchmarks which are slower than in the baseline by more than threshold.
+    """
+    regressions = []
+    for name, result in results.items():
+        if name in baseline and result["seconds"] > baseline[name]["seconds"] * (1 + threshold):
+            regressions.append(name)
+    return regressions
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Run the negotiation benchmarks.")
+    parser.add_argument("--full", action="store_true", help="also run the negotiations over 10k and 100k items")
+    parser.add_argument("--repeats", type=int, default=5)
+    parser.add_argument("--baseline", help="JSON file of a previous run to compare with")
+    parser.add_argument("--threshold", type=float, default=0.2, help="slowdown reported as a regression")
+    parser.add_argument("--save-baseline", help="JSON file to save the results to")
+    args = parser.parse_args()
+
+    results = run(FULL_NB_ITEMS if args.full else NB_ITEMS, args.repeats)
+    baseline = {}
+    if args.baseline:
+        with open(args.baseline) as baseline_file:
+            baseline = json.load(baseline_file)
+    for name, result in results.items():
+        rates = ", ".join(["{0} {1:,.0f}".format(key, value) for key, value in result.items()
+                           if key.endswith("per_second")])
+        change = ""
+        if name in baseline:
+            change = "{0:+.1%} vs baseline".format(result["seconds"] / baseline[name]["seconds"] - 1)
+        print("{0:<32} {1:>10.4f} s  {2}  peak {3:,} bytes  {4}".format(
+            name, result["seconds"], rates, result["peak_memory"], change))
+    if args.save_baseline:
+        with open(args.save_baseline, "w") as baseline_file:
+            json.dump(results, baseline_file, indent=2)
+    regressions = compare(results, baseline, args.threshold)
+    if len(regressions) > 0:
+        print("Regressions: " + ", ".join(regressions))
+        sys.exit(1)
@@ -13,25 +13,47 @@ class CommunicatingAgent(Agent):
     Not intended to be used on its own, but to inherit its methods to multiple
     other agents.
 
+    A subclass declaring a protocol has it compiled into its dispatch table when the class is created.
+
     attr:
         name: The name of the agent (str)
         mailbox: The mailbox of the agent (Mailbox)
         message_service: The message service used to send and receive message (MessageService)
+        protocol: The dialogue protocol of the agent class, None if it has none (Protocol)
     """
 
-    def __init__(self, unique_id, model, name):
+    protocol = None
+
+    def __init_subclass__(cls, **kwargs):
+        """ Compile the protocol of a new subclass, if it declares one.
+        """
+        super().__init_subclass__(**kwargs)
+        if cls.protocol is not None:
+            cls.protocol.compile(cls)
+
+    def __init__(self, unique_id, model, name, message_service=None, retention_policy=None):
         """ Create a new communicating agent.
+        The agent uses the message service of its model unless another one is given, and a mailbox
+        keeping every message unless a retention policy is given.
         """
         super().__init__(unique_id, model)
         self.__name = name
-        self.__mailbox = Mailbox()
-        self.__messages_service = MessageService.get_instance()
+        self.__mailbox = Mailbox(retention_policy)
+        if message_service is None:
+            message_service = MessageService.get_instance(model)
+        self.__messages_service = message_service
+        self.__messages_service.register_agent(self)
 
     def step(self):
         """ The step methods of the agent called by the scheduler at each time tick.
         """
         super().step()
 
+    def close(self):
+        """ Release the resources of the mailbox, such as the log file of its retention policy.
+        """
+        self.__mailbox.close()
+
     def get_name(self):
         """ Return the name of the communicating agent."""
         return self.__name
@@ -41,28 +63,47 @@ class CommunicatingAgent(Agent):
         """
         self.__mailbox.receive_messages(message)
 
+    def receive_message_batch(self, messages):
+        """ Receive a list of messages at once (called by the MessageService object) and store them in the mailbox.
+        """
+        self.__mailbox.receive_message_batch(messages)
+
     def send_message(self, message):
         """ Send message through the MessageService object.
         """
-        print(message)
         self.__messages_service.send_message(message)
 
+    def join_group(self, group):
+        """ Join a group, to receive the messages sent to it.
+        """
+        self.__messages_service.add_to_group(group, self)
+
+    def leave_group(self, group):
+        """ Leave a group.
+        """
+        self.__messages_service.remove_from_group(group, self)
+
     def get_new_messages(self):
         """ Return all the unread messages.
         """
         return self.__mailbox.get_new_messages()
 
+    def get_unread_messages(self):
+        """ Return a view on the unread messages, which leaves them unread.
+        """
+        return self.__mailbox.get_unread_messages()
+
     def get_messages(self):
-        """ Return all the received messages.
+        """ Return all the received messages kept by the retention policy of the mailbox.
         """
         return self.__mailbox.get_messages()
 
     def get_messages_from_performative(self, performative):
-        """ Return a list of messages which have the same performative.
+        """ Return a view on the messages which have the same performative.
         """
         return self.__mailbox.get_messages_from_performative(performative)
 
     def get_messages_from_exp(self, exp):
-        """ Return a list of messages which have the same sender.
+        """ Return a view on the messages which have the same sender.
         """
         return self.__mailbox.get_messages_from_exp(exp)
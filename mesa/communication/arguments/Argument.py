@@ -1,53 +1,60 @@
 #!/usr/bin/env python3
 
-from communication.arguments.Comparison import Comparison
-from communication.arguments.CoupleValue import CoupleValue
+import weakref
 
 
 class Argument:
     """Argument class.
     This class implements an argument used in the negotiation.
 
+    Arguments are immutable and interned: building the same argument twice returns the same object
+    as long as it is still in use, so they can be hashed and compared cheaply.
+
     attr:
-        decision:
-        item:
-        comparison_list:
-        couple_values_list:
+        decision: True for an argument PRO the item, False for an argument CON the item
+        item: the item the argument is about
+        couple_value: the couple value premiss (CoupleValue)
+        comparison: the comparison premiss (Comparison), None if the argument only has a couple value
     """
 
-    def __init__(self, boolean_decision, item):
-        """Creates a new Argument.
-        """
-        self.__decision = boolean_decision
-        self.__item = item
-        self.__comparison_list = []
-        self.__couple_values_list = []
+    __slots__ = ('__decision', '__item', '__couple_value', '__comparison', '__key', '__weakref__')
 
-    def add_premiss_comparison(self, criterion_name_1, criterion_name_2):
-        """Adds a premiss comparison in the comparison list.
-        """
-        self.__comparison_list.append(Comparison(criterion_name_1, criterion_name_2))
+    __instances = weakref.WeakValueDictionary()
 
-    def add_premiss_couple_values(self, criterion_name, value):
-        """Add a premiss couple values in the couple values list.
+    def __new__(cls, boolean_decision, item, couple_value, comparison=None):
+        """Returns the argument, creating it if it is not already in use.
         """
-        self.__couple_values_list.append(CoupleValue(criterion_name, value))
-
+        key = (boolean_decision, item, couple_value, comparison)
+        argument = Argument.__instances.get(key)
+        if argument is None:
+            argument = super().__new__(cls)
+            argument.__decision = boolean_decision
+            argument.__item = item
+            argument.__couple_value = couple_value
+            argument.__comparison = comparison
+            argument.__key = key
+            Argument.__instances[key] = argument
+        return argument
+
+    def __reduce__(self):
+        """Unpickles through the constructor, so that copies are interned too.
+        """
+        return Argument, self.__key
 
     def parse(self):
-        if len(self.__comparison_list) == 0:
-            return (self.__item,self.__decision,self.__couple_values_list[0],None)
-        return (self.__item,self.__decision,self.__couple_values_list[0],self.__comparison_list[0])
+        return (self.__item,self.__decision,self.__couple_value,self.__comparison)
 
     def __str__(self):
         """Returns Item as a String.
         """
-        if len(self.__comparison_list) == 0:
-            return  ("not " if  not self.__decision else "") + str(self.__item.get_name()) + ": " + str(self.__couple_values_list[0])
-        return ("not " if not self.__decision else "") + str(self.__item.get_name()) + ": " + str(self.__comparison_list[0])+ " and " + str(self.__couple_values_list[0])
+        if self.__comparison is None:
+            return  ("not " if  not self.__decision else "") + str(self.__item.get_name()) + ": " + str(self.__couple_value)
+        return ("not " if not self.__decision else "") + str(self.__item.get_name()) + ": " + str(self.__comparison)+ " and " + str(self.__couple_value)
 
     def __eq__(self, other):
-        item, decision, cv_prem, comp_prem = self.parse() 
-        item2, decision2, cv_prem2, comp_prem2 = other.parse()
-        comp_prem_eq = (comp_prem is None and comp_prem2 is None)  or ((comp_prem is not None and comp_prem2 is not None) and comp_prem == comp_prem2)
-        return decision == decision2 and item.get_name() == item2.get_name() and cv_prem == cv_prem2 and comp_prem_eq
+        if not isinstance(other, Argument):
+            return NotImplemented
+        return self.__key == other.__key
+
+    def __hash__(self):
+        return hash(self.__key)
@@ -5,16 +5,33 @@ class Comparison:
     """Comparison class.
     This class implements a comparison object used in argument object.
 
+    Comparisons are immutable and interned: asking twice for the same comparison returns the same object.
+
     attr:
         best_criterion_name:
         worst_criterion_name:
     """
 
-    def __init__(self, best_criterion_name, worst_criterion_name):
-        """Creates a new comparison.
+    __slots__ = ('__best_criterion_name', '__worst_criterion_name')
+
+    __instances = {}
+
+    def __new__(cls, best_criterion_name, worst_criterion_name):
+        """Returns the comparison, creating it the first time it is asked for.
         """
-        self.__best_criterion_name = best_criterion_name
-        self.__worst_criterion_name = worst_criterion_name
+        key = (best_criterion_name, worst_criterion_name)
+        comparison = Comparison.__instances.get(key)
+        if comparison is None:
+            comparison = super().__new__(cls)
+            comparison.__best_criterion_name = best_criterion_name
+            comparison.__worst_criterion_name = worst_criterion_name
+            Comparison.__instances[key] = comparison
+        return comparison
+
+    def __reduce__(self):
+        """Unpickles through the constructor, so that copies are interned too.
+        """
+        return Comparison, self.parse()
 
     def parse(self):
         return self.__best_criterion_name,self.__worst_criterion_name
@@ -23,6 +40,11 @@ class Comparison:
         """Returns Item as a String.
         """
         return str(self.__best_criterion_name) + " > " + str(self.__worst_criterion_name)
-    
+
     def __eq__(self, other):
-        return self.__best_criterion_name ==  other.__best_criterion_name and self.__worst_criterion_name ==  other.__worst_criterion_name
+        if not isinstance(other, Comparison):
+            return NotImplemented
+        return self.__best_criterion_name == other.__best_criterion_name and self.__worst_criterion_name == other.__worst_criterion_name
+
+    def __hash__(self):
+        return hash((self.__best_criterion_name, self.__worst_criterion_name))
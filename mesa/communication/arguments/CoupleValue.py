@@ -5,25 +5,46 @@ class CoupleValue:
     """CoupleValue class.
     This class implements a couple value used in argument object.
 
+    Couple values are immutable and interned: asking twice for the same couple returns the same object.
+
     attr:
         criterion_name:
         value:
     """
 
-    def __init__(self, criterion_name, value):
-        """Creates a new couple value.
+    __slots__ = ('__criterion_name', '__value')
+
+    __instances = {}
+
+    def __new__(cls, criterion_name, value):
+        """Returns the couple value, creating it the first time it is asked for.
         """
-        self.__criterion_name = criterion_name
-        self.__value = value
+        key = (criterion_name, value)
+        couple_value = CoupleValue.__instances.get(key)
+        if couple_value is None:
+            couple_value = super().__new__(cls)
+            couple_value.__criterion_name = criterion_name
+            couple_value.__value = value
+            CoupleValue.__instances[key] = couple_value
+        return couple_value
+
+    def __reduce__(self):
+        """Unpickles through the constructor, so that copies are interned too.
+        """
+        return CoupleValue, self.parse()
 
     def __str__(self):
         """Returns Item as a String.
         """
         return str(self.__criterion_name) + ": " + str(self.__value)
-    
+
     def __eq__(self, other):
-        return self.__criterion_name ==  other.__criterion_name and self.__value ==  other.__value
+        if not isinstance(other, CoupleValue):
+            return NotImplemented
+        return self.__criterion_name == other.__criterion_name and self.__value == other.__value
 
+    def __hash__(self):
+        return hash((self.__criterion_name, self.__value))
 
     def parse(self):
-        return self.__criterion_name,self.__value
\ No newline at end of file
+        return self.__criterion_name,self.__value
@@ -0,0 +1,14 @@
+#!/usr/bin/env python3
+
+from communication.mailbox.RetentionPolicy import RetentionPolicy
+
+
+class CountsOnlyRetentionPolicy(RetentionPolicy):
+    """CountsOnlyRetentionPolicy class.
+    Retention policy which keeps no read message: only the counts by performative of the mailbox remain.
+    """
+
+    def get_capacity(self):
+        """ Return 0: read messages are dropped.
+        """
+        return 0
@@ -0,0 +1,44 @@
+#!/usr/bin/env python3
+
+from communication.mailbox.RetentionPolicy import RetentionPolicy
+
+
+class DiskSpillRetentionPolicy(RetentionPolicy):
+    """DiskSpillRetentionPolicy class.
+    Retention policy which keeps the last read messages in memory and writes the older ones to a log file,
+    one line per message.
+
+    attr:
+        path: the path of the log file (str)
+        size: the number of read messages kept in memory (int)
+        file: the log file
+    """
+
+    def __init__(self, path, size=0):
+        """ Create a new DiskSpillRetentionPolicy writing to the given path.
+        """
+        self.__path = path
+        self.__size = size
+        self.__file = open(path, "a", encoding="utf-8")
+
+    def get_capacity(self):
+        """ Return the number of read messages kept in memory.
+        """
+        return self.__size
+
+    def archive(self, message):
+        """ Write the message to the log file.
+        """
+        self.__file.write(message.to_string(False) + "\n")
+
+    def get_archived_messages(self):
+        """ Return the lines written to the log file.
+        """
+        self.__file.flush()
+        with open(self.__path, encoding="utf-8") as log_file:
+            return log_file.read().splitlines()
+
+    def close(self):
+        """ Close the log file.
+        """
+        self.__file.close()
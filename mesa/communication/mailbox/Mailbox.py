@@ -1,58 +1,116 @@
 #!/usr/bin/env python3
 
+from collections import Counter, deque
+
+from communication.mailbox.MessageView import MessageView
+from communication.mailbox.RetentionPolicy import RetentionPolicy
+
 
 class Mailbox:
     """Mailbox class.
     Class implementing the mailbox object which manages messages in communicating agents.
 
+    Unread messages are always kept. How many read messages are kept in memory is decided by the
+    retention policy, which keeps all of them by default.
+
     attr:
         unread_messages: The list of unread messages
-        read_messages: The list of read messages
+        read_messages: The read messages kept by the retention policy, oldest first
+        messages_by_performative: The messages kept for each performative, in reception order
+        messages_by_exp: The messages kept from each sender, in reception order
+        performative_counts: The number of messages ever received for each performative
+        retention_policy: The policy deciding which read messages are kept (RetentionPolicy)
      """
 
-    def __init__(self):
+    def __init__(self, retention_policy=None):
         """ Create a new Mailbox.
         """
         self.__unread_messages = []
-        self.__read_messages = []
+        self.__read_messages = deque()
+        self.__messages_by_performative = {}
+        self.__messages_by_exp = {}
+        self.__performative_counts = Counter()
+        self.__retention_policy = retention_policy if retention_policy is not None else RetentionPolicy()
 
     def receive_messages(self, message):
         """ Receive a message and add it in the unread messages list.
         """
         self.__unread_messages.append(message)
+        self.__index_message(message)
+
+    def receive_message_batch(self, messages):
+        """ Receive a list of messages at once and add them in the unread messages list.
+        """
+        self.__unread_messages.extend(messages)
+        for message in messages:
+            self.__index_message(message)
 
     def get_new_messages(self):
         """ Return all the messages from unread messages list.
+        The unread list itself is handed over and replaced by an empty one, so no message is copied.
         """
-        unread_messages = self.__unread_messages.copy()
-        if len(unread_messages) > 0:
-            for messages in unread_messages:
-                self.__read_messages.append(messages)
-
-        self.__unread_messages.clear()
+        unread_messages = self.__unread_messages
+        if len(unread_messages) == 0:
+            # The empty unread list stays in the mailbox, so the caller gets a list of its own
+            return []
+        self.__unread_messages = []
+        self.__read_messages.extend(unread_messages)
+        self.__evict_read_messages()
         return unread_messages
 
+    def get_unread_messages(self):
+        """ Return a view on the unread messages, which leaves them unread.
+        """
+        return MessageView(self.__unread_messages)
+
     def get_messages(self):
-        """ Return all the messages from both unread and read messages list.
+        """ Return a view on the read messages kept by the retention policy, after reading the unread ones.
         """
         if len(self.__unread_messages) > 0:
             self.get_new_messages()
-        return self.__read_messages
+        return MessageView(self.__read_messages)
+
+    def get_performative_counts(self):
+        """ Return the number of messages ever received for each performative, whatever the retention policy.
+        """
+        return self.__performative_counts
+
+    def close(self):
+        """ Release the resources of the retention policy, such as its log file.
+        """
+        self.__retention_policy.close()
+
+    def get_retention_policy(self):
+        """ Return the retention policy of the mailbox.
+        """
+        return self.__retention_policy
+
+    def __index_message(self, message):
+        """ Add a received message to the indexes and to the counts.
+        """
+        self.__messages_by_performative.setdefault(message.get_performative(), deque()).append(message)
+        self.__messages_by_exp.setdefault(message.get_exp(), deque()).append(message)
+        self.__performative_counts[message.get_performative()] += 1
+
+    def __evict_read_messages(self):
+        """ Drop the oldest read messages beyond the capacity of the retention policy.
+        The oldest read message is also the oldest message of its indexes, so it is popped from their left.
+        """
+        capacity = self.__retention_policy.get_capacity()
+        if capacity is None:
+            return
+        while len(self.__read_messages) > capacity:
+            message = self.__read_messages.popleft()
+            self.__messages_by_performative[message.get_performative()].popleft()
+            self.__messages_by_exp[message.get_exp()].popleft()
+            self.__retention_policy.archive(message)
 
     def get_messages_from_performative(self, performative):
-        """ Return a list of messages which have the same performative.
+        """ Return a view on the messages which have the same performative, in reception order.
         """
-        messages_from_performative = []
-        for message in self.__unread_messages + self.__read_messages:
-            if message.get_performative() == performative:
-                messages_from_performative.append(message)
-        return messages_from_performative
+        return MessageView(self.__messages_by_performative.get(performative, ()))
 
     def get_messages_from_exp(self, exp):
-        """ Return a list of messages which have the same sender.
+        """ Return a view on the messages which have the same sender, in reception order.
         """
-        messages_from_exp = []
-        for message in self.__unread_messages + self.__read_messages:
-            if message.get_exp() == exp:
-                messages_from_exp.append(message)
-        return messages_from_exp
+        return MessageView(self.__messages_by_exp.get(exp, ()))
@@ -0,0 +1,38 @@
+#!/usr/bin/env python3
+
+from collections.abc import Sequence
+from itertools import islice
+
+
+class MessageView(Sequence):
+    """MessageView class.
+    Read-only view on a sequence of messages kept by a mailbox.
+
+    The view does not copy the messages: it follows the mailbox as new messages are received.
+    Slicing the view returns a list of the messages in the slice.
+
+    attr:
+        messages: the sequence of messages which is viewed
+    """
+
+    __slots__ = ('__messages',)
+
+    def __init__(self, messages):
+        """ Create a new MessageView on a sequence of messages.
+        """
+        self.__messages = messages
+
+    def __len__(self):
+        return len(self.__messages)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            start, stop, step = index.indices(len(self.__messages))
+            if step < 0:
+                return list(self.__messages)[index]
+            # Deques cannot be sliced, but islice only goes through the messages before the slice
+            return list(islice(self.__messages, start, stop, step))
+        return self.__messages[index]
+
+    def __iter__(self):
+        return iter(self.__messages)
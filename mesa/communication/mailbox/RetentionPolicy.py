@@ -0,0 +1,24 @@
+#!/usr/bin/env python3
+
+
+class RetentionPolicy:
+    """RetentionPolicy class.
+    Class implementing how many read messages a mailbox keeps in memory.
+
+    This base policy keeps every message, which is the default behaviour of a mailbox.
+    """
+
+    def get_capacity(self):
+        """ Return the maximum number of read messages kept in memory, None for no limit.
+        """
+        return None
+
+    def archive(self, message):
+        """ Receive a read message which the mailbox does not keep in memory any more.
+        """
+        pass
+
+    def close(self):
+        """ Release the resources of the policy.
+        """
+        pass
@@ -0,0 +1,22 @@
+#!/usr/bin/env python3
+
+from communication.mailbox.RetentionPolicy import RetentionPolicy
+
+
+class RingBufferRetentionPolicy(RetentionPolicy):
+    """RingBufferRetentionPolicy class.
+    Retention policy which only keeps the last read messages.
+
+    attr:
+        size: the number of read messages kept (int)
+    """
+
+    def __init__(self, size):
+        """ Create a new RingBufferRetentionPolicy keeping the given number of read messages.
+        """
+        self.__size = size
+
+    def get_capacity(self):
+        """ Return the number of read messages kept.
+        """
+        return self.__size
@@ -8,11 +8,13 @@ class Message:
 
     attr:
         from_agent: the sender of the message (id)
-        to_agent: the receiver of the message (id)
+        to_agent: the receiver of the message, a group name or MessageService.BROADCAST (id)
         message_performative: the performative of the message
         content: the content of the message
      """
 
+    __slots__ = ('__from_agent', '__to_agent', '__message_performative', '__content')
+
     def __init__(self, from_agent, to_agent, message_performative, content):
         """ Create a new message.
         """
@@ -24,15 +26,21 @@ class Message:
     def __str__(self):
         """ Return Message as a String.
         """
+        return self.to_string()
+
+    def to_string(self, colored=True):
+        """ Return Message as a String, with or without the color codes of the performative.
+        """
+        performative = str(self.__message_performative) if colored else self.__message_performative.name
         if type(self.__content) is tuple:
             return "From " + str(self.__from_agent) + " to " + str(self.__to_agent) \
-               + " (" + str(self.__message_performative) + ") " + " ".join([str(content) for content in self.__content])
+               + " (" + performative + ") " + " ".join([str(content) for content in self.__content])
         if type(self.__content) is list:
             return "From " + str(self.__from_agent) + " to " + str(self.__to_agent) \
-               + " (" + str(self.__message_performative) + ") [ " + ", ".join([str(content) for content in self.__content]) + " ]"
+               + " (" + performative + ") [ " + ", ".join([str(content) for content in self.__content]) + " ]"
 
         return "From " + str(self.__from_agent) + " to " + str(self.__to_agent) \
-               + " (" + str(self.__message_performative) + ") " + str(self.__content)
+               + " (" + performative + ") " + str(self.__content)
 
     def get_exp(self):
         """ Return the sender of the message.
@@ -40,7 +48,7 @@ class Message:
         return self.__from_agent
 
     def get_dest(self):
-        """ Return the receiver of the message.
+        """ Return the receiver of the message, which may be a group name or MessageService.BROADCAST.
         """
         return self.__to_agent
 
@@ -1,65 +1,245 @@
 #!/usr/bin/env python3
 
+import weakref
+from collections import deque
+
+from communication.trace.TraceSink import TraceSink
+
+
 class MessageService:
     """MessageService class.
     Class implementing the message service used to dispatch messages between communicating agents.
 
-    Not intended to be created more than once: it's a singleton.
+    One message service is created per model, so that several models can live in the same process.
+    Agents find the service of their model through get_instance(model). Agents removed from the scheduler
+    are removed from the routing table too, so that messages sent to them fail at once.
+
+    A message is addressed to an agent name, to a group name or to BROADCAST. A message sent to a group
+    reaches every member of the group but its sender, and a broadcast every registered agent but its sender.
+    The same message object is delivered to each of them: messages are never copied.
 
     attr:
         scheduler: the scheduler of the sma (Scheduler)
-        messages_to_proceed: the list of message to proceed mailbox of the agent (list)
+        remove_from_scheduler: the remove method of the scheduler, which the service wraps
+        messages_to_proceed: the deferred messages, queued for each receiving agent (dict of deque)
+        agents: the routing table from agent names to agents (dict)
+        groups: the members of each group, from group names to dicts of agents by name (dict)
+        trace_sink: the sink receiving every message sent, tracing is off by default (TraceSink)
+        sent_count: the number of messages sent since the creation of the service (int)
+        step_counters: the messages sent, and the deliveries queued and done since the previous call to dispatch_messages
+            and the messages still pending (dict)
+        last_step_counters: the step counters as they were at the last call to dispatch_messages (dict)
     """
 
+    BROADCAST = "*"
+
     __instance = None
+    __instances = weakref.WeakValueDictionary()
 
     @staticmethod
-    def get_instance():
+    def get_instance(model=None):
         """ Static access method.
+        Return the message service of the given model, or the last created one when no model is given.
+        The last created service is only weakly referenced, so that it does not keep its model alive.
         """
-        return MessageService.__instance
+        if model is None:
+            return MessageService.__instance() if MessageService.__instance is not None else None
+        message_service = MessageService.__instances.get(id(model))
+        if message_service is not None and message_service.__scheduler.model is not model:
+            return None
+        return message_service
 
     def __init__(self, scheduler, instant_delivery=True):
-        """ Create a new MessageService object.
+        """ Create a new MessageService object for the model of the scheduler.
         """
-        if MessageService.__instance is not None:
-            raise Exception("This class is a singleton!")
-        else:
-            MessageService.__instance = self
-            self.__scheduler = scheduler
-            self.__instant_delivery = instant_delivery
-            self.__messages_to_proceed = []
+        if MessageService.get_instance(scheduler.model) is not None:
+            raise Exception("This model already has a message service!")
+        MessageService.__instance = weakref.ref(self)
+        MessageService.__instances[id(scheduler.model)] = self
+        self.__scheduler = scheduler
+        self.__instant_delivery = instant_delivery
+        self.__messages_to_proceed = {}
+        self.__agents = {}
+        self.__groups = {}
+        self.__trace_sink = TraceSink()
+        self.__sent_count = 0
+        self.__step_counters = {"sent": 0, "queued": 0, "delivered": 0, "pending": 0}
+        self.__last_step_counters = dict(self.__step_counters)
+        self.__remove_from_scheduler = scheduler.remove
+        scheduler.remove = self.__remove_agent
 
     def set_instant_delivery(self, instant_delivery):
         """ Set the instant delivery parameter.
         """
         self.__instant_delivery = instant_delivery
 
+    def set_trace_sink(self, trace_sink):
+        """ Set the sink receiving every message sent, None turns tracing off.
+        """
+        self.__trace_sink = trace_sink if trace_sink is not None else TraceSink()
+
+    def get_trace_sink(self):
+        """ Return the sink receiving every message sent.
+        """
+        return self.__trace_sink
+
     def send_message(self, message):
-        """ Dispatch message if instant delivery active, otherwise add the message to proceed list.
+        """ Dispatch message if instant delivery active, otherwise add the message to the queue of its receivers.
         """
+        self.__trace_sink.trace(message)
+        self.__sent_count += 1
+        self.__step_counters["sent"] += 1
         if self.__instant_delivery:
             self.dispatch_message(message)
+            return
+        members = self.__get_members(message.get_dest())
+        if members is None:
+            self.__queue_message(self.find_agent_from_name(message.get_dest()), message)
         else:
-            self.__messages_to_proceed.append(message)
+            exp = message.get_exp()
+            for name, agent in members.items():
+                if name != exp:
+                    self.__queue_message(agent, message)
+
+    def __queue_message(self, agent, message):
+        """ Add the message to the queue of the receiving agent.
+        """
+        messages = self.__messages_to_proceed.get(agent)
+        if messages is None:
+            messages = self.__messages_to_proceed[agent] = deque()
+        messages.append(message)
+        self.__step_counters["queued"] += 1
+        self.__step_counters["pending"] += 1
 
     def dispatch_message(self, message):
-        """ Dispatch the message to the right agent.
+        """ Dispatch the message to the right agent, or to every receiver of a group or broadcast message.
         """
-        self.find_agent_from_name(message.get_dest()).receive_message(message)
+        members = self.__get_members(message.get_dest())
+        if members is None:
+            self.find_agent_from_name(message.get_dest()).receive_message(message)
+            self.__step_counters["delivered"] += 1
+        else:
+            exp = message.get_exp()
+            for name, agent in members.items():
+                if name != exp:
+                    agent.receive_message(message)
+                    self.__step_counters["delivered"] += 1
 
     def dispatch_messages(self):
         """ Proceed each message received by the message service.
+        The queue of each receiver is delivered to its mailbox in one call, then the step counters restart.
         """
         if len(self.__messages_to_proceed) > 0:
-            for message in self.__messages_to_proceed:
-                self.dispatch_message(message)
+            messages_to_proceed = self.__messages_to_proceed
+            self.__messages_to_proceed = {}
+            for agent, messages in messages_to_proceed.items():
+                agent.receive_message_batch(messages)
+                self.__step_counters["delivered"] += len(messages)
+            self.__step_counters["pending"] = 0
+        self.__last_step_counters = self.__step_counters
+        self.__step_counters = {"sent": 0, "queued": 0, "delivered": 0, "pending": self.__step_counters["pending"]}
 
-        self.__messages_to_proceed.clear()
+    def get_sent_count(self):
+        """ Return the number of messages sent since the creation of the service.
+        """
+        return self.__sent_count
+
+    def get_pending_count(self):
+        """ Return the number of deferred messages waiting for the next call to dispatch_messages.
+        """
+        return self.__step_counters["pending"]
+
+    def get_step_counters(self):
+        """ Return the counters of the last step: the messages sent, queued and delivered between the two
+        last calls to dispatch_messages, and the messages which were still pending after the last one.
+        """
+        return dict(self.__last_step_counters)
+
+    def get_state(self):
+        """ Return the state of the service, e.g. to save it in a snapshot: the delivery mode, the counters and
+        the deferred messages, as lists by receiving agent.
+        """
+        return {"instant_delivery": self.__instant_delivery,
+                "sent_count": self.__sent_count,
+                "step_counters": dict(self.__step_counters),
+                "last_step_counters": dict(self.__last_step_counters),
+                "pending_messages": {agent: list(messages) for agent, messages in self.__messages_to_proceed.items()}}
+
+    def set_state(self, state):
+        """ Restore a state returned by get_state, replacing the counters and the deferred messages.
+        """
+        self.__instant_delivery = state["instant_delivery"]
+        self.__sent_count = state["sent_count"]
+        self.__step_counters = dict(state["step_counters"])
+        self.__last_step_counters = dict(state["last_step_counters"])
+        self.__messages_to_proceed = {agent: deque(messages) for agent, messages in state["pending_messages"].items()}
+
+    def register_agent(self, agent):
+        """ Add an agent to the routing table.
+        """
+        if agent.get_name() == MessageService.BROADCAST or agent.get_name() in self.__groups:
+            raise Exception("The name " + str(agent.get_name()) + " is already used by a group!")
+        registered_agent = self.__agents.get(agent.get_name())
+        if registered_agent is not None and registered_agent is not agent:
+            raise Exception("An agent named " + str(agent.get_name()) + " is already registered!")
+        self.__agents[agent.get_name()] = agent
+
+    def unregister_agent(self, agent):
+        """ Remove an agent from the routing table and from its groups, and drop the deferred messages to it.
+        Called when the agent is removed from the scheduler.
+        """
+        if self.__agents.get(agent.get_name()) is agent:
+            del self.__agents[agent.get_name()]
+        messages = self.__messages_to_proceed.pop(agent, None)
+        if messages is not None:
+            self.__step_counters["pending"] -= len(messages)
+        for group in [group for group, members in self.__groups.items() if members.get(agent.get_name()) is agent]:
+            self.remove_from_group(group, agent)
+
+    def __remove_agent(self, agent):
+        """ Remove an agent from the scheduler, then from the routing table (replaces scheduler.remove).
+        """
+        self.__remove_from_scheduler(agent)
+        if hasattr(agent, "get_name"):
+            self.unregister_agent(agent)
+
+    def add_to_group(self, group, agent):
+        """ Add an agent to a group, which is created on its first member.
+        """
+        if group == MessageService.BROADCAST or group in self.__agents:
+            raise Exception("The name " + str(group) + " is already used by an agent!")
+        self.__groups.setdefault(group, {})[agent.get_name()] = agent
+
+    def remove_from_group(self, group, agent):
+        """ Remove an agent from a group, which is deleted with its last member.
+        """
+        members = self.__groups.get(group)
+        if members is not None and members.get(agent.get_name()) is agent:
+            del members[agent.get_name()]
+            if len(members) == 0:
+                del self.__groups[group]
+
+    def get_group_members(self, group):
+        """ Return the list of the agents of a group, empty for an unknown group.
+        """
+        return list(self.__groups.get(group, {}).values())
+
+    def __get_members(self, dest):
+        """ Return the agents by name a message to dest is delivered to, or None if dest is not a group.
+        """
+        if dest == MessageService.BROADCAST:
+            return self.__agents
+        return self.__groups.get(dest)
 
     def find_agent_from_name(self, agent_name):
         """ Return the agent according to the agent name given.
+        Agents added to the scheduler without being registered are picked up on the first miss.
         """
-        for agent in self.__scheduler.agents:
-            if agent.get_name() == agent_name:
-                return agent
+        agent = self.__agents.get(agent_name)
+        if agent is None:
+            for scheduled_agent in self.__scheduler.agents:
+                self.__agents.setdefault(scheduled_agent.get_name(), scheduled_agent)
+            agent = self.__agents.get(agent_name)
+            if agent is None:
+                raise Exception("No agent named " + str(agent_name) + "!")
+        return agent
@@ -8,13 +8,17 @@ class Item:
     attr:
         name: the name of the item
         description: the description of the item
+        id: the id of the item in its catalog, None if it does not come from a catalog
      """
 
-    def __init__(self, name, description):
+    __slots__ = ('__name', '__description', '__id')
+
+    def __init__(self, name, description, item_id=None):
         """Creates a new Item.
         """
         self.__name = name
         self.__description = description
+        self.__id = item_id
 
     def __str__(self):
         """Returns Item as a String.
@@ -31,6 +35,11 @@ class Item:
         """
         return self.__description
 
+    def get_id(self):
+        """Returns the id of the item in its catalog, None if it does not come from a catalog.
+        """
+        return self.__id
+
     def get_value(self, preferences, criterion_name):
         """Returns the Value of the Item according to agent preferences.
         """
@@ -39,9 +48,4 @@ class Item:
     def get_score(self, preferences):
         """Returns the score of the Item according to agent preferences.
         """
-        criterion_weight = 100
-        sum_result = 0
-        for criterion_name in preferences.get_criterion_name_list():
-            sum_result = sum_result + criterion_weight * self.get_value(preferences, criterion_name).value
-            criterion_weight = criterion_weight / 2
-        return sum_result
+        return preferences.get_score(self)
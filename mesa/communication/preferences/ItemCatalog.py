@@ -0,0 +1,117 @@
+#!/usr/bin/env python3
+
+import os
+from collections.abc import Sequence
+
+import numpy as np
+
+from communication.preferences.CriterionName import CriterionName
+from communication.preferences.Item import Item
+from communication.preferences.ItemCatalogRows import ItemCatalogRows
+
+
+class ItemCatalog(Sequence):
+    """ItemCatalog class.
+    Catalog of items stored on disk with the value matrices of the agents, which are memory-mapped
+    rather than loaded.
+
+    A catalog is a directory holding names.npy and descriptions.npy, the name and description of each item
+    by id, and values/<agent name>.npy, the (item x criterion) value matrix of each agent, with one column
+    per CriterionName and -1 where no value is set. The id of an item is its row in every matrix.
+    Item objects are only created when they are accessed, and processes opening the same catalog share
+    its pages instead of each holding a copy.
+
+    attr:
+        path: the directory of the catalog, None when its arrays are elsewhere (str)
+        names: the name of each item (array)
+        descriptions: the description of each item (array)
+        items: the items created so far, by id (dict)
+    """
+
+    @staticmethod
+    def create(path, names, descriptions):
+        """ Write a new catalog of items to the given directory and return it.
+        """
+        if len(names) != len(descriptions):
+            raise Exception("Expected as many names as descriptions!")
+        os.makedirs(os.path.join(path, "values"), exist_ok=True)
+        np.save(os.path.join(path, "names.npy"), np.array(names, dtype=str))
+        np.save(os.path.join(path, "descriptions.npy"), np.array(descriptions, dtype=str))
+        return ItemCatalog(path)
+
+    def __init__(self, path, names=None, descriptions=None):
+        """ Open the catalog stored in the given directory, or use the given arrays of names and descriptions.
+        """
+        self.__path = path
+        if names is None:
+            # Plain arrays on the mapped pages, whose elements are faster to read than through np.memmap
+            names = np.asarray(np.load(os.path.join(path, "names.npy"), mmap_mode="r"))
+            descriptions = np.asarray(np.load(os.path.join(path, "descriptions.npy"), mmap_mode="r"))
+        self.__names = names
+        self.__descriptions = descriptions
+        self.__items = {}
+
+    def __len__(self):
+        return len(self.__names)
+
+    def __getitem__(self, item_id):
+        """ Return the item with the given id, creating it on the first access.
+        """
+        item = self.__items.get(item_id)
+        if item is None:
+            if not 0 <= item_id < len(self.__names):
+                raise IndexError("No item with id " + str(item_id) + " in the catalog!")
+            item = self.__items[item_id] = Item(str(self.__names[item_id]), str(self.__descriptions[item_id]),
+                                                item_id)
+        return item
+
+    def __iter__(self):
+        return (self[item_id] for item_id in range(len(self.__names)))
+
+    def __contains__(self, item):
+        return self.__items.get(item.get_id()) is item
+
+    def get_created_item_count(self):
+        """ Return the number of Item objects created so far.
+        """
+        return len(self.__items)
+
+    def get_path(self):
+        """ Return the directory of the catalog.
+        """
+        return self.__path
+
+    def get_names(self):
+        """ Return the array of the names of the items, by id.
+        """
+        return self.__names
+
+    def get_descriptions(self):
+        """ Return the array of the descriptions of the items, by id.
+        """
+        return self.__descriptions
+
+    def get_item_rows(self):
+        """ Return the mapping from the items of the catalog to their rows in the value matrices.
+        """
+        return ItemCatalogRows(self)
+
+    def get_value_matrix_names(self):
+        """ Return the sorted names of the value matrices of the catalog.
+        """
+        return sorted(file_name[:-len(".npy")] for file_name in os.listdir(os.path.join(self.__path, "values"))
+                      if file_name.endswith(".npy"))
+
+    def save_value_matrix(self, name, value_matrix):
+        """ Write the value matrix of an agent, with one row per item and one column per CriterionName.
+        """
+        value_matrix = np.asarray(value_matrix, dtype=np.int8)
+        if value_matrix.shape != (len(self), len(CriterionName)):
+            raise Exception("Expected a {0}x{1} value matrix, got {2}!".format(len(self), len(CriterionName),
+                                                                              value_matrix.shape))
+        np.save(os.path.join(self.__path, "values", name + ".npy"), value_matrix)
+
+    def open_value_matrix(self, name):
+        """ Return the value matrix of an agent, memory-mapped: pages are only copied when they are written.
+        """
+        return np.load(os.path.join(self.__path, "values", name + ".npy"), mmap_mode="c")
@@ -0,0 +1,31 @@
+#!/usr/bin/env python3
+
+
+class ItemCatalogRows:
+    """ItemCatalogRows class.
+    Read-only mapping from the items of a catalog to their rows in its value matrices, which are their ids.
+
+    attr:
+        catalog: the catalog of the items (ItemCatalog)
+    """
+
+    __slots__ = ('__catalog',)
+
+    def __init__(self, catalog):
+        """ Create a new mapping for the items of the catalog.
+        """
+        self.__catalog = catalog
+
+    def __len__(self):
+        return len(self.__catalog)
+
+    def __contains__(self, item):
+        return item in self.__catalog
+
+    def __getitem__(self, item):
+        if item not in self.__catalog:
+            raise KeyError(item)
+        return item.get_id()
+
+    def get(self, item, default=None):
+        return item.get_id() if item in self.__catalog else default
@@ -5,15 +5,37 @@ from communication.preferences.CriterionValue import CriterionValue
 from communication.preferences.Item import Item
 from communication.preferences.Value import Value
 from communication.arguments.Argument import Argument
+from communication.arguments.Comparison import Comparison
+from communication.arguments.CoupleValue import CoupleValue
+
+import numpy as np
+
+UNSET_VALUE = -1
+VALUES = tuple(Value)
 
 
 class Preferences:
     """Preferences class.
     This class implements the preferences of an agent.
 
+    Values are stored in a dense (item x criterion) matrix and the score of every item is kept
+    up to date in a vector, so lookups and comparisons between items never rescan the values.
+    The matrix may be the memory-mapped matrix of an ItemCatalog, whose items are then used as they are.
+
     attr:
         criterion_name_list: the list of criterion name (ordered by importance)
         criterion_value_list: the list of criterion value
+        criterion_value_blocks: the blocks of values set in bulk which are not in criterion_value_list yet,
+            and the values added after them
+        item_rows: the row of each item in the value matrix and in the score vector (dict or ItemCatalogRows)
+        items: the items, ordered by row (list or ItemCatalog)
+        value_matrix: the value of each (item, criterion), -1 when not set
+        value_matrix_pending: whether a pending block reads the value matrix, which must then be copied before
+            it is written
+        criterion_weights: the weight of each criterion in the score, derived from criterion_name_list
+        scores: the score of each item
+        better_item_counts: the number of items strictly preferred to each item, rebuilt lazily
+        value_buckets: the rows of the items grouped by value for each criterion, rebuilt lazily
     """
 
     def __init__(self):
@@ -21,6 +43,15 @@ class Preferences:
         """
         self.__criterion_name_list = []
         self.__criterion_value_list = []
+        self.__criterion_value_blocks = []
+        self.__item_rows = {}
+        self.__items = []
+        self.__value_matrix = np.full((16, len(CriterionName)), UNSET_VALUE, dtype=np.int8)
+        self.__value_matrix_pending = False
+        self.__criterion_weights = np.zeros(len(CriterionName))
+        self.__scores = np.zeros(16)
+        self.__better_item_counts = None
+        self.__value_buckets = None
 
     def get_criterion_name_list(self):
         """Returns the list of criterion name.
@@ -29,26 +60,226 @@ class Preferences:
 
     def get_criterion_value_list(self):
         """Returns the list of criterion value.
+        Values set in bulk only become CriterionValue objects when this list is first asked for.
         """
+        for block in self.__criterion_value_blocks:
+            if isinstance(block, CriterionValue):
+                self.__criterion_value_list.append(block)
+                continue
+            items, criterion_names, values = block
+            self.__criterion_value_list.extend([CriterionValue(item, criterion_name, VALUES[value])
+                                                for item, item_values in zip(items, values.tolist())
+                                                for criterion_name, value in zip(criterion_names, item_values)
+                                                if value != UNSET_VALUE])
+        self.__criterion_value_blocks = []
+        self.__value_matrix_pending = False
         return self.__criterion_value_list
 
     def set_criterion_name_list(self, criterion_name_list):
         """Sets the list of criterion name.
+        The list is copied: scores are derived from it, so later changes must go through this method.
         """
-        self.__criterion_name_list = criterion_name_list
+        self.__criterion_name_list = list(criterion_name_list)
+        self.__criterion_weights = np.zeros(len(CriterionName))
+        criterion_weight = 100
+        for criterion_name in self.__criterion_name_list:
+            self.__criterion_weights[criterion_name.value] = criterion_weight
+            criterion_weight = criterion_weight / 2
+        self.__update_scores()
 
     def add_criterion_value(self, criterion_value):
         """Adds a criterion value in the list.
+        While blocks of values are pending, the value is queued after them, so that adding it to the values
+        of a catalog does not create all of them.
+        """
+        if len(self.__criterion_value_blocks) > 0:
+            self.__criterion_value_blocks.append(criterion_value)
+        else:
+            self.__criterion_value_list.append(criterion_value)
+        row = self.__get_or_add_row(criterion_value.get_item())
+        column = criterion_value.get_criterion_name().value
+        # Like the former linear scan, the first value added for a pair wins
+        if self.__value_matrix[row, column] == UNSET_VALUE:
+            self.__make_value_matrix_writeable()
+            value = criterion_value.get_value().value
+            self.__value_matrix[row, column] = value
+            self.__scores[row] += self.__criterion_weights[column] * value
+            self.__better_item_counts = None
+            self.__value_buckets = None
+
+    def set_criterion_values(self, items, criterion_names, values):
+        """Sets the values of many distinct items at once, from an (item x criterion) array of value numbers
+        whose columns follow criterion_names, -1 for no value. As with add_criterion_value, values already
+        set are kept.
         """
-        self.__criterion_value_list.append(criterion_value)
+        values = np.asarray(values)
+        if values.shape != (len(items), len(criterion_names)):
+            raise Exception("Expected a {0}x{1} value matrix, got {2}!".format(len(items), len(criterion_names),
+                                                                              values.shape))
+        if values.size > 0 and values.dtype.kind not in "iu":
+            raise Exception("Expected integer value numbers, got {0}!".format(values.dtype))
+        # The range is checked before the cast to int8, which would wrap larger numbers
+        if values.size > 0 and (values.min() < UNSET_VALUE or values.max() >= len(VALUES)):
+            raise Exception("Unknown value numbers in the value matrix!")
+        values = values.astype(np.int8)
+        self.__criterion_value_blocks.append((list(items), list(criterion_names), values))
+        rows = self.__get_or_add_rows(items)[:, np.newaxis]
+        columns = np.array([criterion_name.value for criterion_name in criterion_names], dtype=np.intp)
+        current_values = self.__value_matrix[rows, columns]
+        self.__make_value_matrix_writeable()
+        self.__value_matrix[rows, columns] = np.where(current_values == UNSET_VALUE, values, current_values)
+        self.__update_scores()
+        self.__value_buckets = None
+
+    def set_catalog(self, catalog, value_matrix):
+        """Uses the items of an ItemCatalog and their (item x criterion) value matrix, with one column per
+        CriterionName. The matrix is not copied, so a memory-mapped matrix stays on disk and a shared one
+        stays shared until a value is added.
+        """
+        if len(self.__items) > 0:
+            raise Exception("The preferences already have items!")
+        if value_matrix.shape != (len(catalog), len(CriterionName)):
+            raise Exception("Expected a {0}x{1} value matrix, got {2}!".format(len(catalog), len(CriterionName),
+                                                                              value_matrix.shape))
+        self.__criterion_value_blocks.append((catalog, list(CriterionName), value_matrix))
+        self.__items = catalog
+        self.__item_rows = catalog.get_item_rows()
+        self.__value_matrix = value_matrix
+        self.__value_matrix_pending = True
+        self.__update_scores()
+        self.__value_buckets = None
+
+    @staticmethod
+    def load_criterion_values(path):
+        """Returns the criterion names and the (item x criterion) array of value numbers stored in a file.
+        A .npy file has one column per criterion, in the order of CriterionName. A CSV file has a header
+        of criterion names, then one row of value numbers per item.
+        """
+        if path.endswith(".npy"):
+            values = np.load(path)
+            if values.ndim != 2 or values.shape[1] != len(CriterionName):
+                raise Exception("Expected one column per criterion in " + path + "!")
+            return list(CriterionName), values
+        with open(path) as csv_file:
+            criterion_names = [CriterionName[name.strip()] for name in csv_file.readline().split(",")]
+            values = np.loadtxt(csv_file, delimiter=",", dtype=np.int64, ndmin=2)
+        return criterion_names, values.reshape(-1, len(criterion_names))
 
     def get_value(self, item, criterion_name):
         """Gets the value for a given item and a given criterion name.
         """
-        for value in self.__criterion_value_list:
-            if value.get_item() == item and value.get_criterion_name() == criterion_name:
-                return value.get_value()
-        return None
+        row = self.__item_rows.get(item)
+        if row is None:
+            return None
+        value = self.__value_matrix.item(row, criterion_name.value)
+        return None if value == UNSET_VALUE else VALUES[value]
+
+    def get_value_matrix(self):
+        """Returns the (item x criterion) matrix of value numbers, -1 where no value is set,
+        with rows in the order of get_items().
+        """
+        return self.__value_matrix[:len(self.__items)]
+
+    def get_items(self):
+        """Returns the items which have at least one value, in the order they were added.
+        """
+        return self.__items
+
+    def get_score(self, item):
+        """Returns the score of an item.
+        """
+        return self.__scores.item(self.__item_rows[item])
+
+    def get_scores(self):
+        """Returns the array of the scores of the items, in the order of get_items().
+        """
+        return self.__scores[:len(self.__items)]
+
+    def __get_rows(self, items):
+        """Returns the rows of the given items as an array.
+        """
+        return np.fromiter((self.__item_rows[item] for item in items), dtype=np.intp, count=len(items))
+
+    def __get_or_add_row(self, item):
+        """Returns the row of an item, allocating a new one for unknown items.
+        """
+        row = self.__item_rows.get(item)
+        if row is None:
+            self.__load_catalog_items()
+            row = len(self.__items)
+            if row == len(self.__scores):
+                self.__grow(max(16, 2 * row))
+            self.__item_rows[item] = row
+            self.__items.append(item)
+        return row
+
+    def __get_or_add_rows(self, items):
+        """Returns the rows of the given items as an array, allocating rows for unknown items at once.
+        """
+        new_items = [item for item in items if item not in self.__item_rows]
+        if len(new_items) > 0:
+            self.__load_catalog_items()
+        if len(self.__items) + len(new_items) > len(self.__scores):
+            self.__grow(max(len(self.__items) + len(new_items), 2 * len(self.__scores)))
+        for row, item in enumerate(new_items, len(self.__items)):
+            self.__item_rows[item] = row
+        self.__items.extend(new_items)
+        return self.__get_rows(items)
+
+    def __load_catalog_items(self):
+        """Replaces the items of a catalog by a list and a dict of rows, before adding items from elsewhere.
+        """
+        if not isinstance(self.__items, list):
+            self.__items = list(self.__items)
+            self.__item_rows = {item: row for row, item in enumerate(self.__items)}
+
+    def __make_value_matrix_writeable(self):
+        """Copies a read-only value matrix, such as the one of a shared catalog, before writing to it.
+        The matrix of a catalog whose values are still pending is copied too, so that they are read as they were.
+        """
+        if not self.__value_matrix.flags.writeable or self.__value_matrix_pending:
+            self.__value_matrix = np.array(self.__value_matrix)
+            self.__value_matrix_pending = False
+
+    def __grow(self, capacity):
+        """Grows the value matrix and the score vector to the given number of rows.
+        """
+        value_matrix = np.full((capacity, len(CriterionName)), UNSET_VALUE, dtype=np.int8)
+        value_matrix[:len(self.__value_matrix)] = self.__value_matrix
+        self.__value_matrix = value_matrix
+        self.__value_matrix_pending = False
+        scores = np.zeros(capacity)
+        scores[:len(self.__scores)] = self.__scores
+        self.__scores = scores
+
+    def __update_scores(self):
+        """Recomputes the score of every item from the value matrix and the criterion weights.
+        """
+        values = np.maximum(self.__value_matrix, 0)
+        self.__scores = values @ self.__criterion_weights
+        self.__better_item_counts = None
+
+    def __get_value_buckets(self):
+        """Returns, for each criterion and each value, the list of the rows of the items having this value.
+        The buckets are only rebuilt after a value was added.
+        """
+        if self.__value_buckets is None:
+            value_matrix = self.__value_matrix[:len(self.__items)]
+            # Compact arrays rather than lists: a list of a million rows holds a million int objects
+            self.__value_buckets = [[np.flatnonzero(value_matrix[:, column] == value.value).astype(np.int32)
+                                     for value in VALUES]
+                                    for column in range(len(CriterionName))]
+        return self.__value_buckets
+
+    def __get_better_item_counts(self):
+        """Returns, for each item, the number of items with a strictly higher score.
+        The index is only rebuilt after the preferences changed.
+        """
+        if self.__better_item_counts is None:
+            scores = self.__scores[:len(self.__items)]
+            sorted_scores = np.sort(scores)
+            self.__better_item_counts = len(scores) - np.searchsorted(sorted_scores, scores, side='right')
+        return self.__better_item_counts
 
     def is_preferred_criterion(self, criterion_name_1, criterion_name_2):
         """Returns if a criterion 1 is preferred to the criterion 2.
@@ -62,19 +293,13 @@ class Preferences:
     def is_preferred_item(self, item_1, item_2):
         """Returns if the item 1 is preferred to the item 2.
         """
-        return item_1.get_score(self) > item_2.get_score(self)
+        return self.get_score(item_1) > self.get_score(item_2)
 
     def most_preferred(self, item_list):
         """Returns the most preferred item from a list.
         """
-        # To be completed
-        best_item = item_list[0]
-        for item in item_list[1:]:
-            if self.is_preferred_item(item, best_item):
-                #then current item is better than best item, update it
-                best_item = item
-                        
-        return best_item
+        # argmax keeps the first of equally scored items, as the former pairwise loop did
+        return item_list[int(np.argmax(self.__scores[self.__get_rows(item_list)]))]
 
     def is_item_among_top_10_percent(self, item, items):
         """
@@ -82,12 +307,28 @@ class Preferences:
 
         :return: a boolean, True means that the item is among the favourite ones
         """
-        #start at 0 as we will add 1 for the item itself
-        item_position = 0
-        for item2 in items:
-            if self.is_preferred_item(item2,item):
-                item_position += 1
-        return item_position <= len(items)//10
+        return self.is_item_among_top_percent(item, items, 10)
+
+    def is_item_among_top_percent(self, item, items, percent):
+        """
+        Return whether a given item is among the top percent of the preferred items.
+
+        :param percent: int - the percentage of the items which are accepted
+        :return: a boolean, True means that the item is among the favourite ones
+        """
+        item_position = np.count_nonzero(self.__scores[self.__get_rows(items)] > self.get_score(item))
+        return item_position <= len(items) * percent // 100
+
+    def is_item_among_top_percent_of_all(self, item, percent):
+        """
+        Return whether a given item is among the top percent of all the items of the preferences.
+        The answer is read from a precomputed rank index.
+
+        :param percent: int - the percentage of the items which are accepted
+        :return: a boolean, True means that the item is among the favourite ones
+        """
+        item_position = self.__get_better_item_counts().item(self.__item_rows[item])
+        return item_position <= len(self.__items) * percent // 100
 
     def list_supporting_proposal(self, item):
         """Generate a list of arguments which can be used to support an item
@@ -98,8 +339,7 @@ class Preferences:
         arguments = []
         for criterion,value in couple_values:
             if value == Value.VERY_GOOD or value == Value.GOOD:
-                argument = Argument(True,item)
-                argument.add_premiss_couple_values(criterion,value)
+                argument = Argument(True,item,CoupleValue(criterion,value))
                 arguments.append(argument)
         return arguments
 
@@ -112,8 +352,7 @@ class Preferences:
         for criterion,value in couple_values:
             arguments = []
             if value == Value.BAD or value == Value.VERY_BAD:
-                argument = Argument(False,item)
-                argument.add_premiss_couple_values(criterion,value)
+                argument = Argument(False,item,CoupleValue(criterion,value))
                 arguments.append(argument)
         return arguments
 
@@ -129,61 +368,64 @@ class Preferences:
             return arguments[0]
         return None
 
-    def attack_cv_premiss(self,all_items,cv_premiss,argued_item,decision):
+    def list_better_item_arguments(self, selectable_items, criterion_name, value):
+        """Generate the arguments PRO the selectable items which have a better value than the given one
+        :param selectable_items: container of the items which can be argued for
+        :return: list of arguments, read from the value buckets of the criterion
+        """
+        arguments = []
+        value_buckets = self.__get_value_buckets()[criterion_name.value]
+        items = self.__items
+        for better_value in VALUES[value.value + 1:]:
+            for row in value_buckets[better_value.value].tolist():
+                item = items[row]
+                if item in selectable_items:
+                    argument = Argument(True,item,CoupleValue(criterion_name,better_value))
+                    arguments.append(argument)
+        return arguments
+
+    def attack_cv_premiss(self,selectable_items,cv_premiss,argued_item,decision):
         criterion,value = cv_premiss.parse()
         #item with better value for criterion
         arguments = []
         if decision:
-            for item in all_items:
-                if self.get_value(item,criterion).value > value.value:
-                    argument = Argument(True,item)
-                    argument.add_premiss_couple_values(criterion,self.get_value(item,criterion))
-                    arguments.append(argument)
+            arguments.extend(self.list_better_item_arguments(selectable_items,criterion,value))
 
         #item has worst or better (depending on decision) value for the criterion to the agent
         if (( decision and self.get_value(argued_item,criterion).value < value.value) or (not decision and self.get_value(argued_item,criterion).value> value.value)):
-            argument = Argument(not decision,argued_item)
-            argument.add_premiss_couple_values(criterion,self.get_value(argued_item,criterion))
+            argument = Argument(not decision,argued_item,CoupleValue(criterion,self.get_value(argued_item,criterion)))
             arguments.append(argument)
         
         for criterion2 in self.__criterion_name_list:
             if self.is_preferred_criterion(criterion2,criterion) and (
               (decision and self.get_value(argued_item,criterion2).value <=  Value.BAD.value)
               or (not decision and self.get_value(argued_item,criterion2).value >=  Value.GOOD.value )):
-                argument = Argument(not decision,argued_item)
-                argument.add_premiss_couple_values(criterion2,self.get_value(argued_item,criterion2))
-                argument.add_premiss_comparison(criterion2,criterion)
+                argument = Argument(not decision,argued_item,CoupleValue(criterion2,self.get_value(argued_item,criterion2)),Comparison(criterion2,criterion))
                 arguments.append(argument)
         
         return arguments
 
-    def attack_composed_premiss(self,all_items,cv_premiss,crit_compare_premiss,argued_item,decision):
+    def attack_composed_premiss(self,selectable_items,cv_premiss,crit_compare_premiss,argued_item,decision):
         criterion,value = cv_premiss.parse()
         criterion1,criterion2 = crit_compare_premiss.parse()
         assert criterion == criterion1
         arguments = []
         #item with better value for criterion
         if decision:
-            for item in all_items:
-                if self.get_value(item,criterion).value > value.value:
-                    argument = Argument(True,item)
-                    argument.add_premiss_couple_values(criterion,self.get_value(item,criterion))
-                    arguments.append(argument)
+            arguments.extend(self.list_better_item_arguments(selectable_items,criterion,value))
 
         if self.is_preferred_criterion(criterion2,criterion1):
-            argument = Argument(not decision,argued_item)
-            argument.add_premiss_couple_values(criterion2,self.get_value(argued_item,criterion2))
-            argument.add_premiss_comparison(criterion2,criterion1)
+            argument = Argument(not decision,argued_item,CoupleValue(criterion2,self.get_value(argued_item,criterion2)),Comparison(criterion2,criterion1))
             arguments.append(argument)
 
         return arguments
 
-    def get_attacking_arguments(self,all_items,argument):
+    def get_attacking_arguments(self,selectable_items,argument):
         argued_item,decision,couple_value_premiss,criterion_comparison_premiss = argument.parse()
         if criterion_comparison_premiss is None:
-            return self.attack_cv_premiss(all_items,couple_value_premiss,argued_item,decision)
+            return self.attack_cv_premiss(selectable_items,couple_value_premiss,argued_item,decision)
         else:
-           return self.attack_composed_premiss(all_items,couple_value_premiss,criterion_comparison_premiss,argued_item,decision)
+           return self.attack_composed_premiss(selectable_items,couple_value_premiss,criterion_comparison_premiss,argued_item,decision)
 
 
 if __name__ == '__main__':
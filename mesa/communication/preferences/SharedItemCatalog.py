@@ -0,0 +1,112 @@
+#!/usr/bin/env python3
+
+import secrets
+from multiprocessing import shared_memory
+
+import numpy as np
+
+from communication.preferences.ItemCatalog import ItemCatalog
+
+
+class SharedItemCatalog(ItemCatalog):
+    """SharedItemCatalog class.
+    Item catalog whose names, descriptions and value matrices are published once in shared memory, for the
+    processes of a pool to read them without copies.
+
+    The process publishing the catalog owns the shared memory blocks and must unlink them when the pool is
+    done. A SharedItemCatalog is pickled as the names of its blocks, so the catalog can be passed to the
+    workers as any argument: each worker attaches to the blocks once, on the first task which uses them.
+    Value matrices are read-only, Preferences copy them before writing.
+
+    attr:
+        layout: the shared memory block, dtype and shape of each array, by key (dict)
+        blocks: the shared memory blocks attached by this process (list)
+        owner: whether this process published the blocks (bool)
+    """
+
+    __attached_catalogs = {}
+
+    @staticmethod
+    def publish(catalog, value_matrix_names=None):
+        """ Copy a catalog and the value matrices of the given names, all of them by default, to new shared
+        memory blocks and return the SharedItemCatalog reading them, owned by this process.
+        """
+        if value_matrix_names is None:
+            value_matrix_names = catalog.get_value_matrix_names()
+        arrays = {"names": catalog.get_names(), "descriptions": catalog.get_descriptions()}
+        for name in value_matrix_names:
+            arrays["values/" + name] = catalog.open_value_matrix(name)
+        prefix = "mas_" + secrets.token_hex(6)
+        layout = {}
+        blocks = []
+        for index, (key, array) in enumerate(arrays.items()):
+            block = shared_memory.SharedMemory(name="{0}_{1}".format(prefix, index), create=True,
+                                               size=max(1, array.nbytes))
+            np.ndarray(array.shape, array.dtype, buffer=block.buf)[...] = array
+            blocks.append(block)
+            layout[key] = (block.name, array.dtype.str, array.shape)
+        catalog = SharedItemCatalog(layout, blocks)
+        SharedItemCatalog.__attached_catalogs[SharedItemCatalog.__get_key(layout)] = catalog
+        return catalog
+
+    @staticmethod
+    def attach(layout):
+        """ Return the SharedItemCatalog reading the blocks of the given layout, attaching to them on the first call.
+        """
+        key = SharedItemCatalog.__get_key(layout)
+        catalog = SharedItemCatalog.__attached_catalogs.get(key)
+        if catalog is None:
+            # Pool workers share the resource tracker of the process which published the blocks,
+            # so attaching does not make them unlink the blocks when they exit
+            blocks = [shared_memory.SharedMemory(name=block_name) for block_name, _, _ in layout.values()]
+            catalog = SharedItemCatalog.__attached_catalogs[key] = SharedItemCatalog(layout, blocks, owner=False)
+        return catalog
+
+    @staticmethod
+    def __get_key(layout):
+        """ Return the key of the catalog of a layout among the attached catalogs.
+        """
+        return tuple(sorted(block_name for block_name, _, _ in layout.values()))
+
+    def __init__(self, layout, blocks, owner=True):
+        """ Create a new SharedItemCatalog on the shared memory blocks of the layout, in the same order.
+        Use publish or attach rather than this constructor.
+        """
+        self.__layout = layout
+        self.__blocks = blocks
+        self.__owner = owner
+        self.__arrays = {}
+        for (key, (_, dtype, shape)), block in zip(layout.items(), blocks):
+            array = np.ndarray(shape, np.dtype(dtype), buffer=block.buf)
+            array.flags.writeable = False
+            self.__arrays[key] = array
+        super().__init__(None, self.__arrays["names"], self.__arrays["descriptions"])
+
+    def __reduce__(self):
+        return SharedItemCatalog.attach, (self.__layout,)
+
+    def get_value_matrix_names(self):
+        """ Return the sorted names of the value matrices of the catalog.
+        """
+        return sorted(key[len("values/"):] for key in self.__layout if key.startswith("values/"))
+
+    def save_value_matrix(self, name, value_matrix):
+        """ Shared catalogs are read-only.
+        """
+        raise Exception("A shared item catalog is read-only!")
+
+    def open_value_matrix(self, name):
+        """ Return the read-only value matrix of an agent, in shared memory.
+        """
+        value_matrix = self.__arrays.get("values/" + name)
+        if value_matrix is None:
+            raise Exception("No value matrix " + str(name) + " in the shared item catalog!")
+        return value_matrix
+
+    def unlink(self):
+        """ Free the shared memory blocks, once no process uses the catalog any more (called by the owner).
+        """
+        if self.__owner:
+            SharedItemCatalog.__attached_catalogs.pop(SharedItemCatalog.__get_key(self.__layout), None)
+            for block in self.__blocks:
+                block.unlink()
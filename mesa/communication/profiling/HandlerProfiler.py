@@ -0,0 +1,95 @@
+#!/usr/bin/env python3
+
+import json
+import time
+from array import array
+
+
+class HandlerProfiler:
+    """HandlerProfiler class.
+    Opt-in profiler of the message handlers of agents. For each handler, it records the number of calls,
+    their latencies, the number of messages they sent and the sizes of the candidate lists they chose from.
+
+    Agents without a profiler do not call it at all, so profiling costs nothing when it is off.
+
+    attr:
+        durations: the duration of every call, by handler name (dict of array)
+        messages_sent: the number of messages sent, by handler name (dict)
+        candidate_sizes: the size of every candidate list recorded, by handler name (dict of array)
+        current_handler: the name of the handler being timed, None between calls (str)
+        start_time: the time at which the current call started (float)
+        start_sent_count: the number of messages sent when the current call started (int)
+    """
+
+    PERCENTILES = (50, 90, 99)
+
+    def __init__(self):
+        """ Create a new HandlerProfiler.
+        """
+        self.__durations = {}
+        self.__messages_sent = {}
+        self.__candidate_sizes = {}
+        self.__current_handler = None
+        self.__start_time = 0.0
+        self.__start_sent_count = 0
+
+    def start(self, handler_name, sent_count):
+        """ Start timing a call of a handler, sent_count being the number of messages sent so far.
+        """
+        self.__current_handler = handler_name
+        self.__start_sent_count = sent_count
+        self.__start_time = time.perf_counter()
+
+    def stop(self, sent_count):
+        """ Stop timing the current call, sent_count being the number of messages sent so far.
+        """
+        duration = time.perf_counter() - self.__start_time
+        durations = self.__durations.get(self.__current_handler)
+        if durations is None:
+            durations = self.__durations[self.__current_handler] = array("d")
+            self.__messages_sent[self.__current_handler] = 0
+        durations.append(duration)
+        self.__messages_sent[self.__current_handler] += sent_count - self.__start_sent_count
+        self.__current_handler = None
+
+    def record_candidate_size(self, size):
+        """ Record the size of a list of candidates the current handler chooses from.
+        """
+        candidate_sizes = self.__candidate_sizes.get(self.__current_handler)
+        if candidate_sizes is None:
+            candidate_sizes = self.__candidate_sizes[self.__current_handler] = array("l")
+        candidate_sizes.append(size)
+
+    def get_stats(self):
+        """ Return the statistics of each handler, by handler name: its number of calls, its cumulative,
+        mean, percentile and maximum latencies (s), the messages it sent and the sizes of its candidate lists.
+        """
+        stats = {}
+        for handler_name, durations in self.__durations.items():
+            sorted_durations = sorted(durations)
+            handler_stats = {"calls": len(durations),
+                             "cumulative_seconds": sum(durations),
+                             "mean_seconds": sum(durations) / len(durations)}
+            for percentile in HandlerProfiler.PERCENTILES:
+                handler_stats["p{}_seconds".format(percentile)] = \
+                    sorted_durations[min(len(durations) - 1, len(durations) * percentile // 100)]
+            handler_stats["max_seconds"] = sorted_durations[-1]
+            handler_stats["messages_sent"] = self.__messages_sent[handler_name]
+            candidate_sizes = self.__candidate_sizes.get(handler_name)
+            if candidate_sizes is not None:
+                handler_stats["candidates"] = {"count": len(candidate_sizes),
+                                               "mean": sum(candidate_sizes) / len(candidate_sizes),
+                                               "max": max(candidate_sizes)}
+            stats[handler_name] = handler_stats
+        return stats
+
+    def to_json(self):
+        """ Return the statistics of each handler as a JSON string.
+        """
+        return json.dumps(self.get_stats(), indent=2, sort_keys=True)
+
+    def write_json(self, path):
+        """ Write the statistics of each handler to a JSON file.
+        """
+        with open(path, "w") as json_file:
+            json_file.write(self.to_json())
@@ -0,0 +1,47 @@
+#!/usr/bin/env python3
+
+
+class Protocol:
+    """Protocol class.
+    Declarative dialogue protocol between two agents.
+
+    The state of a dialogue is the performative of its last message, whoever sent it, and None before
+    the first message. For each state, the protocol declares the performatives which may come next and
+    the name of the method of the agent handling each of them. The declaration is compiled once per agent
+    class into a dispatch table, from (state, performative) to the function of the handler.
+
+    attr:
+        transitions: the handler names of the performatives allowed in each state (dict of dict)
+        dispatch_tables: the compiled dispatch tables, by agent class (dict)
+    """
+
+    def __init__(self, transitions):
+        """ Create a new protocol from the handler names of the performatives allowed in each state.
+        """
+        self.__transitions = {state: dict(handler_names) for state, handler_names in transitions.items()}
+        self.__dispatch_tables = {}
+
+    def get_transitions(self):
+        """ Return the handler names of the performatives allowed in each state.
+        """
+        return self.__transitions
+
+    def get_allowed_performatives(self, state):
+        """ Return the set of the performatives which may follow the given state.
+        """
+        return set(self.__transitions.get(state, {}))
+
+    def compile(self, agent_class):
+        """ Return the dispatch table of the protocol for agent_class, compiling it on the first call.
+        """
+        dispatch_table = self.__dispatch_tables.get(agent_class)
+        if dispatch_table is None:
+            dispatch_table = {}
+            for state, handler_names in self.__transitions.items():
+                for performative, handler_name in handler_names.items():
+                    handler = getattr(agent_class, handler_name, None)
+                    if not callable(handler):
+                        raise Exception("No handler " + str(handler_name) + " in " + agent_class.__name__ + "!")
+                    dispatch_table[(state, performative)] = handler
+            self.__dispatch_tables[agent_class] = dispatch_table
+        return dispatch_table
@@ -3,14 +3,45 @@
 Testing all the functionalities of the communication package.
 """
 
+import gc
+import json
+import os
+import pickle
+import tempfile
+import weakref
+
+import numpy as np
+
 from mesa import Model
 from mesa.time import RandomActivation
 
 from communication.agent.CommunicatingAgent import CommunicatingAgent
+from communication.arguments.Argument import Argument
+from communication.arguments.Comparison import Comparison
+from communication.arguments.CoupleValue import CoupleValue
+from communication.mailbox.CountsOnlyRetentionPolicy import CountsOnlyRetentionPolicy
+from communication.mailbox.DiskSpillRetentionPolicy import DiskSpillRetentionPolicy
 from communication.mailbox.Mailbox import Mailbox
+from communication.mailbox.RingBufferRetentionPolicy import RingBufferRetentionPolicy
 from communication.message.Message import Message
 from communication.message.MessagePerformative import MessagePerformative
 from communication.message.MessageService import MessageService
+from communication.preferences.CriterionName import CriterionName
+from communication.preferences.CriterionValue import CriterionValue
+from communication.preferences.Item import Item
+from communication.preferences.ItemCatalog import ItemCatalog
+from communication.preferences.SharedItemCatalog import SharedItemCatalog
+from communication.preferences.Preferences import Preferences
+from communication.preferences.Value import Value
+from communication.profiling.HandlerProfiler import HandlerProfiler
+from communication.protocol.Protocol import Protocol
+from communication.snapshot.SnapshotReader import SnapshotReader
+from communication.snapshot.SnapshotWriter import SnapshotWriter
+from communication.trace.CountingTraceSink import CountingTraceSink
+from communication.trace.FileTraceSink import FileTraceSink
+from pw_argumentation import ArgumentAgent, ArgumentModel, TerminationReason
+from pw_snapshot import restore_snapshot, save_snapshot
+from pw_sweep import METRICS, format_criterion_orders, parse_criterion_orders, parse_seeds, run_sweep, write_csv
 
 
 class TestAgent(CommunicatingAgent):
@@ -39,7 +70,23 @@ class TestModel(Model):
         self.schedule.step()
 
 
+class EchoArgumentAgent(ArgumentAgent):
+    """ EchoArgumentAgent which inherit from ArgumentAgent to test cycles: it answers every argument with itself.
+    """
+    def handle_argue_message(self, m):
+        self.send_message(Message(self.get_name(), m.get_exp(), MessagePerformative.ARGUE, m.get_content()))
+
+
+class EchoArgumentModel(ArgumentModel):
+    """ EchoArgumentModel which inherit from ArgumentModel to negotiate between EchoArgumentAgents.
+    """
+    agent_class = EchoArgumentAgent
+
+
 if __name__ == "__main__":
+    # Every file written by the tests goes to this directory, which is also removed if a test fails
+    test_directory = tempfile.TemporaryDirectory()
+
     print("*---- Testing communication package ----")
     print("*")
     print("* 1) Testing Mailbox receive & get methods")
@@ -64,8 +111,63 @@ if __name__ == "__main__":
     assert(len(mailbox.get_messages_from_performative(MessagePerformative.ACCEPT)) == 1)
     assert(len(mailbox.get_messages_from_performative(MessagePerformative.PROPOSE)) == 1)
     assert(len(mailbox.get_messages_from_performative(MessagePerformative.ARGUE)) == 1)
+    assert(len(mailbox.get_messages_from_performative(MessagePerformative.COMMIT)) == 0)
+    messages_from_agent1 = mailbox.get_messages_from_exp("Agent1")
+    assert(list(messages_from_agent1) == [m1, m2])
+    mailbox.receive_messages(Message("Agent1", "Agent2", MessagePerformative.COMMIT, "Bye"))
+    assert(len(messages_from_agent1) == 3)
     print("*     get_messages_from_performative() => OK")
 
+    assert(mailbox.get_messages()[0:2] == [m1, m2])
+    assert(mailbox.get_messages()[-2:] == [m3, mailbox.get_messages()[3]])
+    assert(mailbox.get_messages()[::-2] == [mailbox.get_messages()[3], m2])
+    assert(mailbox.get_messages_from_exp("Agent1")[1:] == [m2, mailbox.get_messages()[3]])
+    print("*     slices of messages => OK")
+
+    batch_mailbox = Mailbox()
+    batch_mailbox.receive_message_batch([m1, m2])
+    batch_mailbox.receive_messages(m3)
+    new_messages = batch_mailbox.get_new_messages()
+    assert(new_messages == [m1, m2, m3])
+    no_messages = batch_mailbox.get_new_messages()
+    assert(no_messages == [])
+    batch_mailbox.receive_messages(m3)
+    assert(no_messages == [] and batch_mailbox.get_new_messages() == [m3])
+    assert(batch_mailbox.get_new_messages() is not batch_mailbox.get_new_messages())
+    batch_mailbox.receive_messages(m1)
+    assert(new_messages == [m1, m2, m3])
+    assert(len(batch_mailbox.get_messages_from_exp("Agent1")) == 3)
+    print("*     receive_message_batch() => OK")
+
+    ring_mailbox = Mailbox(RingBufferRetentionPolicy(2))
+    for message in [m1, m2, m3]:
+        ring_mailbox.receive_messages(message)
+    assert(list(ring_mailbox.get_messages()) == [m2, m3])
+    assert(list(ring_mailbox.get_messages_from_exp("Agent1")) == [m2])
+    assert(len(ring_mailbox.get_messages_from_performative(MessagePerformative.PROPOSE)) == 0)
+    assert(ring_mailbox.get_performative_counts()[MessagePerformative.PROPOSE] == 1)
+    print("*     RingBufferRetentionPolicy => OK")
+
+    counts_mailbox = Mailbox(CountsOnlyRetentionPolicy())
+    for message in [m1, m2, m3]:
+        counts_mailbox.receive_messages(message)
+    assert(len(counts_mailbox.get_messages_from_exp("Agent1")) == 2)
+    assert(len(counts_mailbox.get_new_messages()) == 3)
+    assert(len(counts_mailbox.get_messages()) == 0)
+    assert(len(counts_mailbox.get_messages_from_exp("Agent1")) == 0)
+    assert(sum(counts_mailbox.get_performative_counts().values()) == 3)
+    print("*     CountsOnlyRetentionPolicy => OK")
+
+    spill_policy = DiskSpillRetentionPolicy(os.path.join(test_directory.name, "mailbox.log"), 1)
+    spill_mailbox = Mailbox(spill_policy)
+    for message in [m1, m2, m3]:
+        spill_mailbox.receive_messages(message)
+    assert(list(spill_mailbox.get_messages()) == [m3])
+    assert(spill_policy.get_archived_messages() == ["From Agent1 to Agent2 (PROPOSE) Bonjour",
+                                                    "From Agent1 to Agent2 (ACCEPT) Hello"])
+    spill_policy.close()
+    print("*     DiskSpillRetentionPolicy => OK")
+
     print("* 2) Testing CommunicatingAgent & MessageService")
 
     communicating_model = TestModel()
@@ -80,6 +182,51 @@ if __name__ == "__main__":
     assert(agent1.get_name() == "Agent1")
     print("*     get_name() => OK")
 
+    assert(MessageService.get_instance(communicating_model).find_agent_from_name("Agent1") is agent1)
+    try:
+        MessageService.get_instance(communicating_model).find_agent_from_name("Agent2")
+        assert(False)
+    except Exception as exception:
+        assert(str(exception) == "No agent named Agent2!")
+    print("*     find_agent_from_name() => OK")
+
+    other_model = TestModel()
+    other_agent1 = other_model.schedule.agents[1]
+    assert(MessageService.get_instance(other_model) is not MessageService.get_instance(communicating_model))
+    assert(MessageService.get_instance(communicating_model).find_agent_from_name("Agent1") is agent1)
+    assert(MessageService.get_instance(other_model).find_agent_from_name("Agent1") is other_agent1)
+    other_model.schedule.agents[0].send_message(Message("Agent0", "Agent1", MessagePerformative.COMMIT, "Hola"))
+    assert(len(other_agent1.get_new_messages()) == 1)
+    assert(len(agent1.get_new_messages()) == 0)
+    print("*     one MessageService per model => OK")
+
+    released_model = TestModel()
+    released_model_reference = weakref.ref(released_model)
+    assert(MessageService.get_instance() is MessageService.get_instance(released_model))
+    del released_model
+    gc.collect()
+    assert(released_model_reference() is None)
+    assert(MessageService.get_instance() is None)
+    print("*     models are released with their MessageService => OK")
+
+    removal_model = TestModel()
+    removed_agent = removal_model.schedule.agents[1]
+    MessageService.get_instance(removal_model).set_instant_delivery(False)
+    removal_model.schedule.agents[0].send_message(Message("Agent0", "Agent1", MessagePerformative.PROPOSE, "Hola"))
+    removal_model.schedule.remove(removed_agent)
+    assert(MessageService.get_instance(removal_model).get_pending_count() == 0)
+    removal_model.step()
+    assert(len(removed_agent.get_messages()) == 0)
+    for instant_delivery in [True, False]:
+        MessageService.get_instance(removal_model).set_instant_delivery(instant_delivery)
+        try:
+            removal_model.schedule.agents[0].send_message(Message("Agent0", "Agent1", MessagePerformative.PROPOSE,
+                                                                  "Hola"))
+            assert(False)
+        except Exception as exception:
+            assert(str(exception) == "No agent named Agent1!")
+    print("*     agents removed from the scheduler => OK")
+
     agent0.send_message(Message("Agent0", "Agent1", MessagePerformative.COMMIT, "Bonjour"))
     agent1.send_message(Message("Agent1", "Agent0", MessagePerformative.COMMIT, "Bonjour"))
     agent0.send_message(Message("Agent0", "Agent1", MessagePerformative.COMMIT, "Comment ça va ?"))
@@ -90,7 +237,7 @@ if __name__ == "__main__":
     assert(len(agent1.get_messages()) == 2)
     print("*     send_message() & dispatch_message (instant delivery) => OK")
 
-    MessageService.get_instance().set_instant_delivery(False)
+    MessageService.get_instance(communicating_model).set_instant_delivery(False)
 
     agent0.send_message(Message("Agent0", "Agent1", MessagePerformative.COMMIT, "Bonjour"))
     agent1.send_message(Message("Agent1", "Agent0", MessagePerformative.COMMIT, "Bonjour"))
@@ -98,12 +245,426 @@ if __name__ == "__main__":
 
     assert(len(agent0.get_messages()) == 1)
     assert(len(agent1.get_messages()) == 2)
+    assert(MessageService.get_instance(communicating_model).get_pending_count() == 3)
 
     communicating_model.step()
 
+    assert(MessageService.get_instance(communicating_model).get_pending_count() == 0)
+    assert(MessageService.get_instance(communicating_model).get_step_counters() ==
+           {"sent": 6, "queued": 3, "delivered": 6, "pending": 0})
+
     assert(len(agent0.get_new_messages()) == 1)
     assert(len(agent1.get_new_messages()) == 2)
     assert(len(agent0.get_messages()) == 2)
     assert(len(agent1.get_messages()) == 4)
     print("*     send_message() & dispatch_messages => OK")
 
+    other_agent0 = other_model.schedule.agents[0]
+    other_agent2 = TestAgent(2, other_model, "Agent2")
+    other_model.schedule.add(other_agent2)
+    other_agent0.join_group("team")
+    other_agent2.join_group("team")
+    other_agent1.get_new_messages()
+    other_agent0.send_message(Message("Agent0", "team", MessagePerformative.PROPOSE, "Salut"))
+    other_agent0.send_message(Message("Agent0", MessageService.BROADCAST, MessagePerformative.PROPOSE, "Salut"))
+    assert(len(other_agent0.get_new_messages()) == 0)
+    assert(len(other_agent1.get_new_messages()) == 1)
+    broadcast_messages = other_agent2.get_new_messages()
+    assert(len(broadcast_messages) == 2)
+    assert(broadcast_messages[1] is other_agent1.get_messages()[-1])
+    MessageService.get_instance(other_model).set_instant_delivery(False)
+    other_agent2.leave_group("team")
+    other_agent2.send_message(Message("Agent2", MessageService.BROADCAST, MessagePerformative.PROPOSE, "Salut"))
+    assert(MessageService.get_instance(other_model).get_pending_count() == 2)
+    assert(MessageService.get_instance(other_model).get_group_members("team") == [other_agent0])
+    try:
+        TestAgent(3, other_model, "team")
+        assert(False)
+    except Exception as exception:
+        assert(str(exception) == "The name team is already used by a group!")
+    print("*     group & broadcast messages => OK")
+
+    print("* 3) Testing Preferences")
+
+    preferences = Preferences()
+    preferences.set_criterion_name_list([CriterionName.PRODUCTION_COST, CriterionName.NOISE])
+    item1 = Item("Item1", "First item")
+    item2 = Item("Item2", "Second item")
+    preferences.add_criterion_value(CriterionValue(item1, CriterionName.PRODUCTION_COST, Value.GOOD))
+    preferences.add_criterion_value(CriterionValue(item1, CriterionName.NOISE, Value.BAD))
+    preferences.add_criterion_value(CriterionValue(item2, CriterionName.PRODUCTION_COST, Value.VERY_BAD))
+    preferences.add_criterion_value(CriterionValue(item2, CriterionName.NOISE, Value.VERY_GOOD))
+
+    assert(len(preferences.get_criterion_value_list()) == 4)
+    assert(preferences.get_value(item1, CriterionName.NOISE) == Value.BAD)
+    assert(preferences.get_value(item2, CriterionName.PRODUCTION_COST) == Value.VERY_BAD)
+    assert(preferences.get_value(item2, CriterionName.DURABILITY) is None)
+    print("*     get_value() => OK")
+
+    assert(item1.get_score(preferences) == 100 * Value.GOOD.value + 50 * Value.BAD.value)
+    assert(preferences.is_preferred_item(item1, item2))
+    assert(preferences.most_preferred([item2, item1]) is item1)
+    preferences.set_criterion_name_list([CriterionName.NOISE, CriterionName.PRODUCTION_COST])
+    assert(item2.get_score(preferences) == 100 * Value.VERY_GOOD.value + 50 * Value.VERY_BAD.value)
+    assert(preferences.most_preferred([item1, item2]) is item2)
+    print("*     get_score() & most_preferred() => OK")
+
+    item3 = Item("Item3", "Third item")
+    preferences.add_criterion_value(CriterionValue(item3, CriterionName.PRODUCTION_COST, Value.AVERAGE))
+    preferences.add_criterion_value(CriterionValue(item3, CriterionName.NOISE, Value.AVERAGE))
+    assert(preferences.is_item_among_top_10_percent(item2, [item1, item2, item3]))
+    assert(not preferences.is_item_among_top_10_percent(item3, [item1, item2, item3]))
+    assert(preferences.is_item_among_top_percent(item3, [item1, item2, item3], 50))
+    assert(not preferences.is_item_among_top_percent(item1, [item1, item2, item3], 50))
+    assert(preferences.is_item_among_top_percent(item1, [item1, item3], 50))
+    assert(preferences.is_item_among_top_percent(item1, [item3, item1, item1], 50))
+    assert(preferences.is_item_among_top_percent_of_all(item3, 50))
+    assert(not preferences.is_item_among_top_percent_of_all(item1, 50))
+    print("*     is_item_among_top_percent() => OK")
+
+    bulk_preferences = Preferences()
+    bulk_preferences.set_criterion_name_list([CriterionName.NOISE, CriterionName.PRODUCTION_COST])
+    bulk_preferences.add_criterion_value(CriterionValue(item1, CriterionName.NOISE, Value.VERY_BAD))
+    bulk_preferences.set_criterion_values([item1, item2], [CriterionName.PRODUCTION_COST, CriterionName.NOISE],
+                                          [[Value.GOOD.value, Value.BAD.value], [Value.VERY_BAD.value, Value.VERY_GOOD.value]])
+    assert(bulk_preferences.get_value(item1, CriterionName.NOISE) == Value.VERY_BAD)
+    assert(bulk_preferences.get_value(item2, CriterionName.NOISE) == Value.VERY_GOOD)
+    assert(item2.get_score(bulk_preferences) == 100 * Value.VERY_GOOD.value + 50 * Value.VERY_BAD.value)
+    assert(len(bulk_preferences.get_criterion_value_list()) == 5)
+    assert(bulk_preferences.get_criterion_value_list()[2].get_value() == Value.BAD)
+    values_path = os.path.join(test_directory.name, "values.csv")
+    with open(values_path, "w") as values_file:
+        values_file.write("NOISE,PRODUCTION_COST\n4,0\n1,3\n")
+    assert(Preferences.load_criterion_values(values_path)[0] == [CriterionName.NOISE, CriterionName.PRODUCTION_COST])
+    assert(Preferences.load_criterion_values(values_path)[1].tolist() == [[4, 0], [1, 3]])
+    np.save(values_path + ".npy", np.zeros((2, len(CriterionName)), dtype=np.int8))
+    assert(Preferences.load_criterion_values(values_path + ".npy")[1].shape == (2, len(CriterionName)))
+    for wrong_values, error in [(np.array([[260, 0]]), "Unknown value numbers in the value matrix!"),
+                                ([[-2, 0]], "Unknown value numbers in the value matrix!"),
+                                ([[1.5, 0]], "Expected integer value numbers, got float64!")]:
+        try:
+            Preferences().set_criterion_values([item1], [CriterionName.NOISE, CriterionName.PRODUCTION_COST],
+                                               wrong_values)
+            assert(False)
+        except Exception as exception:
+            assert(str(exception) == error)
+    print("*     set_criterion_values() & load_criterion_values() => OK")
+
+    rng = np.random.default_rng(0)
+    bucket_items = [Item("Item{}".format(i), "Some random item") for i in range(50)]
+    bucket_preferences = Preferences()
+    bucket_preferences.set_criterion_name_list(list(CriterionName))
+    bucket_preferences.set_criterion_values(bucket_items, list(CriterionName),
+                                            rng.integers(len(Value), size=(50, len(CriterionName))))
+    for _ in range(100):
+        selectable_items = set([item for item in bucket_items if rng.random() < 0.5])
+        criterion_name = CriterionName(int(rng.integers(len(CriterionName))))
+        value = Value(int(rng.integers(len(Value))))
+        # The former scan over the selectable items
+        scanned_arguments = set()
+        for item in selectable_items:
+            item_value = bucket_preferences.get_value(item, criterion_name)
+            if item_value.value > value.value:
+                scanned_arguments.add(Argument(True, item, CoupleValue(criterion_name, item_value)))
+        bucket_arguments = bucket_preferences.list_better_item_arguments(selectable_items, criterion_name, value)
+        assert(len(bucket_arguments) == len(scanned_arguments) and set(bucket_arguments) == scanned_arguments)
+    print("*     list_better_item_arguments() => OK")
+
+    catalog = ItemCatalog.create(os.path.join(test_directory.name, "catalog"), ["Item1", "Item2"], ["First", "Second"])
+    catalog.save_value_matrix("agent", np.array([[3, -1, -1, -1, 1], [0, -1, -1, -1, 4]]))
+    catalog_preferences = Preferences()
+    catalog_preferences.set_criterion_name_list([CriterionName.NOISE, CriterionName.PRODUCTION_COST])
+    catalog_preferences.set_catalog(catalog, catalog.open_value_matrix("agent"))
+    assert(catalog[1] is catalog[1] and catalog[1].get_name() == "Item2" and catalog[1].get_id() == 1)
+    assert(catalog_preferences.get_value(catalog[0], CriterionName.PRODUCTION_COST) == Value.GOOD)
+    assert(catalog_preferences.get_value(item1, CriterionName.PRODUCTION_COST) is None)
+    assert(catalog_preferences.most_preferred(list(catalog)) is catalog[1])
+    assert(len(catalog_preferences.get_criterion_value_list()) == 4)
+    catalog_preferences.add_criterion_value(CriterionValue(item1, CriterionName.NOISE, Value.AVERAGE))
+    assert(catalog_preferences.get_items() == [catalog[0], catalog[1], item1])
+    assert(ItemCatalog(catalog.get_path()).open_value_matrix("agent")[1, 4] == 4)
+    large_catalog = ItemCatalog.create(os.path.join(test_directory.name, "large_catalog"),
+                                       ["Item{}".format(i) for i in range(1000)], ["Some random item"] * 1000)
+    large_catalog.save_value_matrix("agent", np.zeros((1000, len(CriterionName)), dtype=np.int8))
+    large_catalog_preferences = Preferences()
+    large_catalog_preferences.set_criterion_name_list([CriterionName.NOISE])
+    large_catalog_preferences.set_catalog(large_catalog, large_catalog.open_value_matrix("agent"))
+    large_catalog_preferences.add_criterion_value(CriterionValue(large_catalog[1], CriterionName.NOISE, Value.GOOD))
+    assert(large_catalog.get_created_item_count() == 1)
+    assert(large_catalog_preferences.get_value(large_catalog[1], CriterionName.NOISE) == Value.VERY_BAD)
+    assert(len(large_catalog_preferences.get_criterion_value_list()) == 1000 * len(CriterionName) + 1)
+    assert(large_catalog_preferences.get_criterion_value_list()[-1].get_value() == Value.GOOD)
+    unset_catalog_preferences = Preferences()
+    unset_catalog_preferences.set_criterion_name_list([CriterionName.NOISE, CriterionName.DURABILITY])
+    unset_catalog_preferences.set_catalog(catalog, catalog.open_value_matrix("agent"))
+    unset_catalog_preferences.add_criterion_value(CriterionValue(catalog[0], CriterionName.DURABILITY, Value.GOOD))
+    assert(unset_catalog_preferences.get_value(catalog[0], CriterionName.DURABILITY) == Value.GOOD)
+    assert([(criterion_value.get_item(), criterion_value.get_criterion_name())
+            for criterion_value in unset_catalog_preferences.get_criterion_value_list()].count(
+               (catalog[0], CriterionName.DURABILITY)) == 1)
+    assert(len(unset_catalog_preferences.get_criterion_value_list()) == 5)
+    empty_catalog = ItemCatalog.create(os.path.join(test_directory.name, "empty_catalog"), [], [])
+    empty_catalog.save_value_matrix("agent", np.zeros((0, len(CriterionName)), dtype=np.int8))
+    empty_catalog_preferences = Preferences()
+    empty_catalog_preferences.set_criterion_name_list([CriterionName.NOISE])
+    empty_catalog_preferences.set_catalog(empty_catalog, empty_catalog.open_value_matrix("agent"))
+    empty_catalog_preferences.add_criterion_value(CriterionValue(item1, CriterionName.NOISE, Value.GOOD))
+    assert(empty_catalog_preferences.get_items() == [item1])
+    print("*     ItemCatalog => OK")
+
+    shared_catalog = SharedItemCatalog.publish(catalog)
+    try:
+        assert(shared_catalog.get_value_matrix_names() == ["agent"])
+        assert(pickle.loads(pickle.dumps(shared_catalog)) is shared_catalog)
+        shared_preferences = Preferences()
+        shared_preferences.set_criterion_name_list([CriterionName.NOISE, CriterionName.PRODUCTION_COST])
+        shared_preferences.set_catalog(shared_catalog, shared_catalog.open_value_matrix("agent"))
+        assert(shared_preferences.get_value(shared_catalog[1], CriterionName.NOISE) == Value.VERY_GOOD)
+        shared_preferences.add_criterion_value(CriterionValue(shared_catalog[1], CriterionName.DURABILITY, Value.GOOD))
+        assert(shared_preferences.get_value(shared_catalog[1], CriterionName.DURABILITY) == Value.GOOD)
+        assert(shared_catalog.open_value_matrix("agent")[1, CriterionName.DURABILITY.value] == -1)
+    finally:
+        shared_catalog.unlink()
+    print("*     SharedItemCatalog => OK")
+
+    print("* 4) Testing Arguments")
+
+    argument = Argument(True, item1, CoupleValue(CriterionName.NOISE, Value.GOOD),
+                        Comparison(CriterionName.NOISE, CriterionName.PRODUCTION_COST))
+    same_argument = Argument(True, item1, CoupleValue(CriterionName.NOISE, Value.GOOD),
+                             Comparison(CriterionName.NOISE, CriterionName.PRODUCTION_COST))
+    assert(argument is same_argument)
+    assert(argument != Argument(False, item1, CoupleValue(CriterionName.NOISE, Value.GOOD),
+                                Comparison(CriterionName.NOISE, CriterionName.PRODUCTION_COST)))
+    assert(argument != Argument(True, item1, CoupleValue(CriterionName.NOISE, Value.GOOD)))
+    assert(len({argument, same_argument}) == 1)
+    assert(argument.parse() == (item1, True, CoupleValue(CriterionName.NOISE, Value.GOOD),
+                                Comparison(CriterionName.NOISE, CriterionName.PRODUCTION_COST)))
+    print("*     interned & hashable arguments => OK")
+
+    print("* 5) Testing trace sinks")
+
+    trace_model = TestModel()
+    trace_agent0 = trace_model.schedule.agents[0]
+    counting_trace_sink = CountingTraceSink()
+    MessageService.get_instance(trace_model).set_trace_sink(counting_trace_sink)
+    trace_agent0.send_message(Message("Agent0", "Agent1", MessagePerformative.PROPOSE, "Bonjour"))
+    trace_agent0.send_message(Message("Agent0", "Agent1", MessagePerformative.ACCEPT, "Bonjour"))
+    trace_agent0.send_message(Message("Agent0", "Agent1", MessagePerformative.ACCEPT, "Bonjour"))
+    assert(counting_trace_sink.get_count() == 3)
+    assert(counting_trace_sink.get_counts()[MessagePerformative.ACCEPT] == 2)
+    print("*     CountingTraceSink => OK")
+
+    trace_path = os.path.join(test_directory.name, "trace.txt")
+    file_trace_sink = FileTraceSink(trace_path, buffer_size=2)
+    MessageService.get_instance(trace_model).set_trace_sink(file_trace_sink)
+    trace_agent0.send_message(Message("Agent0", "Agent1", MessagePerformative.PROPOSE, "Bonjour"))
+    trace_agent0.send_message(Message("Agent0", "Agent1", MessagePerformative.ARGUE, ("Hello", "there")))
+    trace_agent0.send_message(Message("Agent0", "Agent1", MessagePerformative.TERMINATE, ["Hola"]))
+    file_trace_sink.close()
+    with open(trace_path, encoding="utf-8") as trace_file:
+        assert(trace_file.read().splitlines() == ["From Agent0 to Agent1 (PROPOSE) Bonjour",
+                                                  "From Agent0 to Agent1 (ARGUE) Hello there",
+                                                  "From Agent0 to Agent1 (TERMINATE) [ Hola ]"])
+    print("*     FileTraceSink => OK")
+
+    print("* 6) Testing HandlerProfiler")
+
+    profiler = HandlerProfiler()
+    for sent_count in range(4):
+        profiler.start("handle_argue_message", 2 * sent_count)
+        profiler.record_candidate_size(sent_count)
+        profiler.stop(2 * sent_count + 2)
+    profiler.start("handle_propose_message", 8)
+    profiler.stop(8)
+    profile_stats = profiler.get_stats()
+    assert(profile_stats["handle_argue_message"]["calls"] == 4)
+    assert(profile_stats["handle_argue_message"]["messages_sent"] == 8)
+    assert(profile_stats["handle_argue_message"]["candidates"] == {"count": 4, "mean": 1.5, "max": 3})
+    assert(profile_stats["handle_argue_message"]["p50_seconds"] <= profile_stats["handle_argue_message"]["max_seconds"])
+    assert("candidates" not in profile_stats["handle_propose_message"])
+    assert(json.loads(profiler.to_json()) == profile_stats)
+    print("*     get_stats() & to_json() => OK")
+
+    print("* 7) Testing Protocol")
+
+    protocol = Protocol({None: {MessagePerformative.PROPOSE: "receive_message"},
+                         MessagePerformative.PROPOSE: {MessagePerformative.ACCEPT: "step"}})
+    ProtocolAgent = type("ProtocolAgent", (TestAgent,), {"protocol": protocol})
+    dispatch_table = protocol.compile(ProtocolAgent)
+    assert(protocol.compile(ProtocolAgent) is dispatch_table)
+    assert(dispatch_table[(None, MessagePerformative.PROPOSE)] is ProtocolAgent.receive_message)
+    assert(dispatch_table.get((None, MessagePerformative.QUERY_REF)) is None)
+    assert(protocol.get_allowed_performatives(MessagePerformative.PROPOSE) == {MessagePerformative.ACCEPT})
+    try:
+        type("BrokenAgent", (TestAgent,), {"protocol": Protocol({None: {MessagePerformative.PROPOSE: "handle"}})})
+        assert(False)
+    except Exception as exception:
+        assert(str(exception) == "No handler handle in BrokenAgent!")
+    print("*     compile() => OK")
+
+    unexpected_model = ArgumentModel(20, seed=1)
+    unexpected_agent1, unexpected_agent2 = unexpected_model.agents
+    unexpected_agent1.send_message(Message("agent1", "agent2", MessagePerformative.QUERY_REF, "Item1"))
+    assert(unexpected_agent1.dialogue_states["agent2"] == MessagePerformative.PROPOSE)
+    unexpected_agent2.send_message(Message("agent2", "agent1", MessagePerformative.INFORM_REF, "Item1"))
+    assert(unexpected_model.run() == TerminationReason.HALTED)
+    assert(unexpected_agent1.unexpected_message_count == 1 and unexpected_agent2.unexpected_message_count == 1)
+    reference_model = ArgumentModel(20, seed=1)
+    reference_model.run()
+    assert(unexpected_model.get_stats() == reference_model.get_stats())
+    print("*     unexpected messages => OK")
+
+    print("* 8) Testing snapshots")
+
+    snapshot_writer = SnapshotWriter(b"TEST", 1)
+    snapshot_writer.write_uint(300)
+    snapshot_writer.write_optional_uint(None)
+    snapshot_writer.write_uints([0, 2 ** 70])
+    snapshot_writer.write_bool(True)
+    snapshot_writer.write_float(0.5)
+    snapshot_writer.write_strs(["Item1", "Ça va"])
+    snapshot_writer.write_array(np.array([[1, -1], [4, 0]], dtype=np.int8))
+    snapshot = snapshot_writer.get_snapshot()
+    snapshot_reader = SnapshotReader(snapshot, b"TEST", [1])
+    assert(snapshot_reader.read_uint() == 300)
+    assert(snapshot_reader.read_optional_uint() is None)
+    assert(snapshot_reader.read_uints() == [0, 2 ** 70])
+    assert(snapshot_reader.read_bool() and snapshot_reader.read_float() == 0.5)
+    assert(snapshot_reader.read_strs() == ["Item1", "Ça va"])
+    assert(snapshot_reader.read_array().tolist() == [[1, -1], [4, 0]])
+    try:
+        SnapshotReader(snapshot, b"TEST", [2])
+        assert(False)
+    except Exception as exception:
+        assert(str(exception) == "Unsupported snapshot version 1!")
+    print("*     SnapshotWriter & SnapshotReader => OK")
+
+    # Deferred delivery leaves a message pending, and the round-robin model is saved in its second round
+    for nb_agents, pairing, instant_delivery, nb_steps in [(2, "pairwise", True, 20), (2, "pairwise", False, 20),
+                                                           (4, "round_robin", True, 400)]:
+        snapshot_model = ArgumentModel(50, seed=3, nb_agents=nb_agents, pairing=pairing)
+        MessageService.get_instance(snapshot_model).set_instant_delivery(instant_delivery)
+        snapshot_model.run(max_steps=nb_steps)
+        restored_model = restore_snapshot(save_snapshot(snapshot_model))
+        assert(MessageService.get_instance(restored_model).get_pending_count()
+               == MessageService.get_instance(snapshot_model).get_pending_count())
+        assert(snapshot_model.run() == restored_model.run() == TerminationReason.HALTED)
+        assert(restored_model.get_stats() == snapshot_model.get_stats())
+        assert([[item.get_name() for item in agent.get_all_committed_items()] for agent in restored_model.agents]
+               == [[item.get_name() for item in agent.get_all_committed_items()] for agent in snapshot_model.agents])
+    print("*     save_snapshot() & restore_snapshot() => OK")
+
+    print("* 9) Testing ArgumentModel")
+
+    accepting_model = ArgumentModel(20, seed=1, acceptance_percent=100)
+    assert(all([agent.acceptance_percent == 100 for agent in accepting_model.agents]))
+    assert(accepting_model.run() == TerminationReason.HALTED)
+    assert(accepting_model.get_stats()["agents"][0]["acceptance_rate"] == 1.0)
+    assert(accepting_model.get_stats()["agents"][0]["nb_committed_items"] == 20)
+    print("*     acceptance_percent => OK")
+
+    candidate_model = ArgumentModel(30, seed=2, start=False)
+    candidate_agent = candidate_model.agent1
+    candidate_items = list(candidate_agent.preference.get_items())
+    rng = np.random.default_rng(2)
+    while True:
+        preferred_item = candidate_agent.get_preferred_selectable_item()
+        selectable_items = [item for item in candidate_items if candidate_agent.is_selectable(item)]
+        # The items before candidate_index are all committed or rejected
+        assert(not any([candidate_agent.is_selectable(candidate_items[row])
+                        for row in candidate_agent.candidates[:candidate_agent.candidate_index].tolist()]))
+        if len(selectable_items) == 0:
+            assert(preferred_item is None)
+            break
+        assert(preferred_item is candidate_agent.preference.most_preferred(selectable_items))
+        # Either the preferred item or another one at random is committed or rejected
+        item = preferred_item if rng.random() < 0.5 else selectable_items[int(rng.integers(len(selectable_items)))]
+        if rng.random() < 0.5:
+            candidate_agent.commit_item(item)
+        else:
+            candidate_agent.rejected_items.add(item)
+    print("*     get_preferred_selectable_item() => OK")
+
+    pairwise_model = ArgumentModel(20, seed=1, nb_agents=4)
+    assert(pairwise_model.run() == TerminationReason.HALTED)
+    pairwise_stats = pairwise_model.get_stats()["agents"]
+    assert(pairwise_stats[0]["nb_committed_items"] == pairwise_stats[1]["nb_committed_items"] > 0)
+    assert(pairwise_stats[2]["nb_committed_items"] == pairwise_stats[3]["nb_committed_items"] > 0)
+    for nb_agents in [3, 4]:
+        # Every proposal is accepted, so each negotiation commits all the items
+        round_robin_model = ArgumentModel(20, seed=1, nb_agents=nb_agents, pairing="round_robin",
+                                          acceptance_percent=100)
+        assert(round_robin_model.run() == TerminationReason.HALTED)
+        assert([agent_stats["nb_committed_items"] for agent_stats in round_robin_model.get_stats()["agents"]]
+               == [20 * (nb_agents - 1)] * nb_agents)
+    for nb_agents, error in [(1, "Negotiations need at least two agents!"),
+                             (3, "Pairwise negotiations need an even number of agents!")]:
+        try:
+            ArgumentModel(20, seed=1, nb_agents=nb_agents)
+            assert(False)
+        except Exception as exception:
+            assert(str(exception) == error)
+    print("*     N agents, pairwise & round_robin => OK")
+
+    halted_model = ArgumentModel(20, seed=1)
+    assert(halted_model.run() == TerminationReason.HALTED and halted_model.is_finished())
+    assert(halted_model.get_stats()["termination_reason"] == "HALTED")
+    bounded_model = ArgumentModel(20, seed=1)
+    assert(bounded_model.run(max_steps=0) == TerminationReason.MAX_STEPS and bounded_model.step_index == 0)
+    assert(bounded_model.run(max_steps=5) == TerminationReason.MAX_STEPS and bounded_model.step_index == 5)
+    assert(bounded_model.run(max_seconds=0) == TerminationReason.TIMEOUT and bounded_model.step_index == 5)
+    assert(bounded_model.run() == TerminationReason.HALTED)
+    # Proposals are handled without any answer, so no message is sent after the first one
+    silent_protocol = Protocol({None: {MessagePerformative.PROPOSE: "handle_unexpected_message"}})
+    silent_model = ArgumentModel(20, seed=1, protocol=silent_protocol)
+    assert(silent_model.run() == TerminationReason.STALLED and silent_model.step_index == 1)
+    echo_model = EchoArgumentModel(20, seed=1)
+    assert(echo_model.run(max_steps=1000, cycle_window=10) == TerminationReason.CYCLE)
+    assert(echo_model.step_index < 1000)
+    print("*     run() & TerminationReason => OK")
+
+    spill_directory = os.path.join(test_directory.name, "spill")
+    os.makedirs(spill_directory)
+    spill_policies = []
+
+    def create_spill_policy(name):
+        spill_policies.append(DiskSpillRetentionPolicy(os.path.join(spill_directory, name + ".log")))
+        return spill_policies[-1]
+
+    spill_model = ArgumentModel(20, seed=1, retention_policy=create_spill_policy)
+    spill_model.run()
+    assert(len(spill_policies) == 2 and len(spill_model.agent1.get_messages()) == 0)
+    assert(len(spill_policies[0].get_archived_messages()) > 0)
+    spill_model.close()
+    try:
+        spill_policies[1].archive(m1)
+        assert(False)
+    except ValueError:
+        pass
+    print("*     retention_policy & close() => OK")
+
+    print("* 10) Testing sweeps")
+
+    assert(parse_seeds(["3", "5-7"]) == [3, 5, 6, 7])
+    criterion_orders = ([CriterionName.NOISE, CriterionName.CONSUMPTION],
+                        [CriterionName.CONSUMPTION, CriterionName.NOISE])
+    assert(parse_criterion_orders(format_criterion_orders(criterion_orders)) == criterion_orders)
+    assert(format_criterion_orders(parse_criterion_orders("random")) == "random")
+    print("*     parse_seeds() & criterion orders => OK")
+
+    sweep_results = run_sweep([10, 20], [0, 1], [None, criterion_orders], processes=1)
+    assert(len(sweep_results) == 8)
+    assert([(result["nb_items"], result["seed"]) for result in sweep_results[:4]]
+           == [(10, 0), (10, 0), (10, 1), (10, 1)])
+    assert(run_sweep([10, 20], [0, 1], [None, criterion_orders], processes=2) == sweep_results)
+    print("*     run_sweep() => OK")
+
+    sweep_path = os.path.join(test_directory.name, "sweep.csv")
+    write_csv(sweep_results, sweep_path)
+    with open(sweep_path) as sweep_file:
+        assert(sweep_file.readline().strip() == ",".join(METRICS))
+        assert(len(sweep_file.readlines()) == 8)
+    print("*     write_csv() => OK")
+
+    test_directory.cleanup()
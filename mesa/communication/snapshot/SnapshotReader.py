@@ -0,0 +1,96 @@
+#!/usr/bin/env python3
+
+import struct
+import zlib
+
+import numpy as np
+
+
+class SnapshotReader:
+    """SnapshotReader class.
+    Reader of the versioned binary format of snapshots written by SnapshotWriter.
+
+    attr:
+        version: the version of the format of the snapshot (int)
+        payload: the decompressed payload (bytes)
+        position: the position of the next value in the payload (int)
+    """
+
+    def __init__(self, snapshot, magic, versions):
+        """ Open a snapshot, checking that it is of the given kind and in one of the given versions.
+        """
+        snapshot_magic, self.__version = struct.unpack_from(">8sH", snapshot)
+        if snapshot_magic != struct.pack(">8s", magic):
+            raise Exception("Not a snapshot of the expected kind!")
+        if self.__version not in versions:
+            raise Exception("Unsupported snapshot version " + str(self.__version) + "!")
+        self.__payload = zlib.decompress(snapshot[struct.calcsize(">8sH"):])
+        self.__position = 0
+
+    def get_version(self):
+        """ Return the version of the format of the snapshot.
+        """
+        return self.__version
+
+    def read_uint(self):
+        """ Read a non-negative integer.
+        """
+        value = 0
+        shift = 0
+        while True:
+            byte = self.__payload[self.__position]
+            self.__position += 1
+            value |= (byte & 0x7f) << shift
+            if byte < 0x80:
+                return value
+            shift += 7
+
+    def read_optional_uint(self):
+        """ Read a non-negative integer or None.
+        """
+        value = self.read_uint()
+        return None if value == 0 else value - 1
+
+    def read_uints(self):
+        """ Read a list of non-negative integers.
+        """
+        return [self.read_uint() for _ in range(self.read_uint())]
+
+    def read_bool(self):
+        """ Read a boolean.
+        """
+        self.__position += 1
+        return self.__payload[self.__position - 1] != 0
+
+    def read_float(self):
+        """ Read a float.
+        """
+        value, = struct.unpack_from(">d", self.__payload, self.__position)
+        self.__position += 8
+        return value
+
+    def read_bytes(self):
+        """ Read a string of bytes.
+        """
+        size = self.read_uint()
+        self.__position += size
+        return self.__payload[self.__position - size:self.__position]
+
+    def read_str(self):
+        """ Read a string.
+        """
+        return self.read_bytes().decode("utf-8")
+
+    def read_strs(self):
+        """ Read a list of strings.
+        """
+        count = self.read_uint()
+        joined = self.read_str()
+        return joined.split("\0") if count > 0 else []
+
+    def read_array(self):
+        """ Read a numpy array, which owns its memory.
+        """
+        dtype = np.dtype(self.read_str())
+        shape = tuple(self.read_uints())
+        return np.frombuffer(self.read_bytes(), dtype=dtype).reshape(shape).copy()
@@ -0,0 +1,92 @@
+#!/usr/bin/env python3
+
+import struct
+import zlib
+
+import numpy as np
+
+
+class SnapshotWriter:
+    """SnapshotWriter class.
+    Writer of the versioned binary format of snapshots, read back by SnapshotReader.
+
+    A snapshot starts with a magic string and a format version, followed by the zlib-compressed payload.
+    Integers are written as variable-length unsigned integers, so small numbers take a single byte,
+    and arrays as their raw bytes.
+
+    attr:
+        magic: the bytes identifying the kind of snapshot, at most 8 (bytes)
+        version: the version of the format (int)
+        chunks: the encoded payload so far (list of bytes)
+    """
+
+    def __init__(self, magic, version):
+        """ Create a new SnapshotWriter for the given kind and version of snapshot.
+        """
+        self.__magic = magic
+        self.__version = version
+        self.__chunks = []
+
+    def write_uint(self, value):
+        """ Write a non-negative integer, of any size.
+        """
+        if value < 0:
+            raise Exception("Cannot write the negative integer " + str(value) + "!")
+        encoded = bytearray()
+        while value >= 0x80:
+            encoded.append((value & 0x7f) | 0x80)
+            value >>= 7
+        encoded.append(value)
+        self.__chunks.append(bytes(encoded))
+
+    def write_optional_uint(self, value):
+        """ Write a non-negative integer or None.
+        """
+        self.write_uint(0 if value is None else value + 1)
+
+    def write_uints(self, values):
+        """ Write a list of non-negative integers.
+        """
+        self.write_uint(len(values))
+        for value in values:
+            self.write_uint(value)
+
+    def write_bool(self, value):
+        """ Write a boolean.
+        """
+        self.__chunks.append(b"\x01" if value else b"\x00")
+
+    def write_float(self, value):
+        """ Write a float.
+        """
+        self.__chunks.append(struct.pack(">d", value))
+
+    def write_bytes(self, value):
+        """ Write a string of bytes.
+        """
+        self.write_uint(len(value))
+        self.__chunks.append(bytes(value))
+
+    def write_str(self, value):
+        """ Write a string.
+        """
+        self.write_bytes(value.encode("utf-8"))
+
+    def write_strs(self, values):
+        """ Write a list of strings, which compress better together than one by one.
+        """
+        self.write_uint(len(values))
+        self.write_str("\0".join(values))
+
+    def write_array(self, array):
+        """ Write a numpy array of numbers, with its dtype and shape.
+        """
+        array = np.ascontiguousarray(array)
+        self.write_str(array.dtype.str)
+        self.write_uints(array.shape)
+        self.write_bytes(array.tobytes())
+
+    def get_snapshot(self):
+        """ Return the snapshot: the header and the compressed payload.
+        """
+        return struct.pack(">8sH", self.__magic, self.__version) + zlib.compress(b"".join(self.__chunks))
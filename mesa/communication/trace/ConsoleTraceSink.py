@@ -0,0 +1,22 @@
+#!/usr/bin/env python3
+
+from communication.trace.TraceSink import TraceSink
+
+
+class ConsoleTraceSink(TraceSink):
+    """ConsoleTraceSink class.
+    Trace sink which prints every message, human-readable, as soon as it is sent.
+
+    attr:
+        colored: whether the performatives are colored (bool)
+    """
+
+    def __init__(self, colored=True):
+        """ Create a new ConsoleTraceSink.
+        """
+        self.__colored = colored
+
+    def trace(self, message):
+        """ Print the message.
+        """
+        print(message.to_string(self.__colored))
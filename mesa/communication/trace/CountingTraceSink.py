@@ -0,0 +1,34 @@
+#!/usr/bin/env python3
+
+from collections import Counter
+
+from communication.trace.TraceSink import TraceSink
+
+
+class CountingTraceSink(TraceSink):
+    """CountingTraceSink class.
+    Trace sink which only counts the messages, by performative, without formatting them.
+
+    attr:
+        counts: the number of messages traced for each performative (Counter)
+    """
+
+    def __init__(self):
+        """ Create a new CountingTraceSink.
+        """
+        self.__counts = Counter()
+
+    def trace(self, message):
+        """ Count the message.
+        """
+        self.__counts[message.get_performative()] += 1
+
+    def get_count(self):
+        """ Return the number of messages traced.
+        """
+        return sum(self.__counts.values())
+
+    def get_counts(self):
+        """ Return the number of messages traced for each performative.
+        """
+        return self.__counts
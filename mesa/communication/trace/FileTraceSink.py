@@ -0,0 +1,45 @@
+#!/usr/bin/env python3
+
+from communication.trace.TraceSink import TraceSink
+
+
+class FileTraceSink(TraceSink):
+    """FileTraceSink class.
+    Trace sink which writes the messages to a file, one line per message.
+
+    Messages are kept as objects and only formatted when the buffer is flushed, which happens
+    every buffer_size messages and when the sink is closed.
+
+    attr:
+        file: the file the messages are written to
+        buffer_size: the number of messages buffered before writing them (int)
+        buffer: the messages which are not written yet (list)
+    """
+
+    def __init__(self, path, buffer_size=1000):
+        """ Create a new FileTraceSink writing to the given path.
+        """
+        self.__file = open(path, "w", encoding="utf-8")
+        self.__buffer_size = buffer_size
+        self.__buffer = []
+
+    def trace(self, message):
+        """ Buffer the message, writing the buffer out when it is full.
+        """
+        self.__buffer.append(message)
+        if len(self.__buffer) >= self.__buffer_size:
+            self.flush()
+
+    def flush(self):
+        """ Format and write the buffered messages.
+        """
+        if len(self.__buffer) > 0:
+            self.__file.write("".join([message.to_string(False) + "\n" for message in self.__buffer]))
+            self.__buffer.clear()
+        self.__file.flush()
+
+    def close(self):
+        """ Flush the buffered messages and close the file.
+        """
+        self.flush()
+        self.__file.close()
@@ -0,0 +1,25 @@
+#!/usr/bin/env python3
+
+
+class TraceSink:
+    """TraceSink class.
+    Class implementing the interface of the sinks which receive every message sent through a message service.
+
+    This base sink discards the messages: it is the one used when tracing is off. Sinks only format a
+    message when they actually need its text.
+    """
+
+    def trace(self, message):
+        """ Receive a message sent through the message service.
+        """
+        pass
+
+    def flush(self):
+        """ Write out the messages which are still buffered.
+        """
+        pass
+
+    def close(self):
+        """ Flush the sink and release its resources.
+        """
+        self.flush()
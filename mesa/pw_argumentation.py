@@ -5,40 +5,170 @@ from communication.agent.CommunicatingAgent import CommunicatingAgent
 from communication.message.MessageService import MessageService
 from communication.message.Message import Message
 from communication.message.MessagePerformative import MessagePerformative
-from communication.preferences.Preferences import Preferences
+from communication.preferences.Preferences import Preferences, VALUES
 from communication.preferences.Item import Item
+from communication.preferences.ItemCatalog import ItemCatalog
 from communication.preferences.CriterionName import CriterionName
 from communication.preferences.CriterionValue import CriterionValue
-from communication.preferences.Value import Value
+from communication.protocol.Protocol import Protocol
+from communication.trace.ConsoleTraceSink import ConsoleTraceSink
 
+from enum import Enum
+import random
+import time
 import numpy as np
 
 
 
 
 
+class SelectableItems:
+    """ Read-only view on the items an agent can still propose, which does not copy them.
+    """
+    def __init__(self, agent):
+        self.__agent = agent
+
+    def __contains__(self, item):
+        return self.__agent.is_selectable(item)
+
+    def __iter__(self):
+        return (item for item in self.__agent.items if self.__agent.is_selectable(item))
+
+
+ARGUMENT_PROTOCOL = Protocol({
+    None: {MessagePerformative.PROPOSE: "handle_propose_message",
+           MessagePerformative.TERMINATE: "handle_terminate_message"},
+    MessagePerformative.PROPOSE: {MessagePerformative.ACCEPT: "handle_accept_message",
+                                  MessagePerformative.ASK_WHY: "handle_ask_why_message"},
+    MessagePerformative.ASK_WHY: {MessagePerformative.ARGUE: "handle_argue_message",
+                                  MessagePerformative.DONT_KNOW: "handle_dont_know_message"},
+    MessagePerformative.ARGUE: {MessagePerformative.ARGUE: "handle_argue_message",
+                                MessagePerformative.ACCEPT: "handle_accept_message",
+                                MessagePerformative.PROPOSE: "handle_propose_message",
+                                MessagePerformative.TERMINATE: "handle_terminate_message"},
+    MessagePerformative.ACCEPT: {MessagePerformative.COMMIT: "handle_commit_message"},
+    MessagePerformative.COMMIT: {MessagePerformative.COMMIT: "handle_commit_message",
+                                 MessagePerformative.PROPOSE: "handle_propose_message",
+                                 MessagePerformative.TERMINATE: "handle_terminate_message"},
+    MessagePerformative.DONT_KNOW: {MessagePerformative.PROPOSE: "handle_propose_message",
+                                    MessagePerformative.TERMINATE: "handle_terminate_message"},
+})
+
+
 class ArgumentAgent(CommunicatingAgent):
     """ ArgumentAgent which inherit from CommunicatingAgent.
+    A proposed item is accepted when it is among the acceptance_percent best items of the agent.
+
+    The rows of the items which can still be proposed are kept in an array sorted by the agent's score, best first:
+    committed and rejected items are only skipped once they reach the front.
+
+    Messages are dispatched to the handlers by the dialogue protocol, ARGUMENT_PROTOCOL unless another one is
+    given. Messages the protocol does not allow in the state of their dialogue are counted and ignored.
+    The handlers are only timed when the agent is given a profiler.
     """
-    def __init__(self, unique_id, model, name,criterions):
-        super().__init__(unique_id, model, name)
+    protocol = ARGUMENT_PROTOCOL
+
+    def __init__(self, unique_id, model, name,criterions,acceptance_percent=10,retention_policy=None,protocol=None):
+        super().__init__(unique_id, model, name, retention_policy=retention_policy)
+        self.__dispatch_table = (protocol or self.protocol).compile(type(self))
+        self.dialogue_states = {}
+        self.unexpected_message_count = 0
         self.preference = Preferences()
         self.preference.set_criterion_name_list(criterions)
         self.items = set()
         self.committed_items = []
+        self.committed_item_set = set()
         self.rejected_items = set()
-        self.arguments_used = []
+        self.candidates = None
+        self.candidate_index = 0
+        self.arguments_used = set()
         self.victory_count = 0
         self.propositions = 0
         self.accepted_propositions = 0
         self.is_proposed_by_me = False
+        self.__vote_to_halt = False
+        self.acceptance_percent = acceptance_percent
+        self.previous_committed_items = []
+        self.profiler = None
+
+    @property
+    def vote_to_halt(self):
+        return self.__vote_to_halt
+
+    @vote_to_halt.setter
+    def vote_to_halt(self, vote_to_halt):
+        """ Set the vote of the agent, keeping the count of halted agents of the model up to date.
+        """
+        if vote_to_halt != self.__vote_to_halt:
+            self.__vote_to_halt = vote_to_halt
+            self.model.count_vote_to_halt(1 if vote_to_halt else -1)
+
+    def start_session(self):
+        """ Forget the state of the previous negotiation before negotiating with a new partner.
+        The committed items are kept in previous_committed_items for the statistics.
+        """
+        self.previous_committed_items.extend(self.committed_items)
+        self.committed_items = []
+        self.committed_item_set = set()
+        self.rejected_items = set()
+        self.candidates = None
+        self.arguments_used = set()
+        self.is_proposed_by_me = False
+        self.dialogue_states = {}
         self.vote_to_halt = False
 
-    
+    def get_all_committed_items(self):
+        """ Return the items committed in all the negotiations of the agent.
+        """
+        return self.previous_committed_items + self.committed_items
+
+    def is_selectable(self, item):
+        return item in self.items and item not in self.committed_item_set and item not in self.rejected_items
+
+    def commit_item(self, item):
+        self.committed_items.append(item)
+        self.committed_item_set.add(item)
+
+    def get_preferred_selectable_item(self):
+        """ Return the preferred item which is neither committed nor rejected, None if there is none.
+        """
+        if self.candidates is None:
+            # The stable sort orders equal scores by the position of the item in the preferences
+            self.candidates = np.argsort(-self.preference.get_scores(), kind="stable").astype(np.int32)
+            self.candidate_index = 0
+        items = self.preference.get_items()
+        while self.candidate_index < len(self.candidates):
+            item = items[self.candidates.item(self.candidate_index)]
+            if self.is_selectable(item):
+                return item
+            self.candidate_index += 1
+        return None
+
+    def send_message(self, message):
+        """ Send the message, which moves its dialogue to a new state.
+        Messages which the protocol does not allow in this state leave it unchanged, as on reception.
+        """
+        transition = (self.dialogue_states.get(message.get_dest()), message.get_performative())
+        if transition in self.__dispatch_table:
+            self.dialogue_states[message.get_dest()] = message.get_performative()
+        super().send_message(message)
+
+    def get_handler(self, m):
+        """ Return the function handling the message in the state of its dialogue, and move the dialogue on.
+        Messages which the protocol does not allow in this state leave it unchanged.
+        """
+        handler = self.__dispatch_table.get((self.dialogue_states.get(m.get_exp()), m.get_performative()))
+        if handler is None:
+            return type(self).handle_unexpected_message
+        self.dialogue_states[m.get_exp()] = m.get_performative()
+        return handler
+
+    def handle_unexpected_message(self,m):
+        self.unexpected_message_count += 1
+
     def propose_preferred_item(self,exp):
-        selectable_items = list(self.items.difference(set(self.committed_items)).difference(self.rejected_items))
-        if len(selectable_items) > 0:
-            preferred_item = self.preference.most_preferred(selectable_items)      
+        preferred_item = self.get_preferred_selectable_item()
+        if preferred_item is not None:
             self.send_message(Message(self.get_name(),exp,MessagePerformative.PROPOSE,preferred_item))
             self.is_proposed_by_me = True
             self.propositions +=1
@@ -48,7 +178,7 @@ class ArgumentAgent(CommunicatingAgent):
 
     def handle_propose_message(self,m):
         self.is_proposed_by_me = False
-        if self.preference.is_item_among_top_10_percent(m.get_content(),self.items):
+        if self.preference.is_item_among_top_percent_of_all(m.get_content(),self.acceptance_percent):
             self.send_message(Message(self.get_name(),m.get_exp(),MessagePerformative.ACCEPT,m.get_content()))
         else:
             self.send_message(Message(self.get_name(),m.get_exp(),MessagePerformative.ASK_WHY,m.get_content()))
@@ -56,14 +186,14 @@ class ArgumentAgent(CommunicatingAgent):
     def handle_accept_message(self,m):
         self.victory_count += 1
         self.send_message(Message(self.get_name(),m.get_exp(),MessagePerformative.COMMIT,m.get_content()))
-        self.committed_items.append(m.get_content())
+        self.commit_item(m.get_content())
 
     def handle_commit_message(self,m):
         if self.is_proposed_by_me:
             self.accepted_propositions += 1
-        if m.get_content() not in self.committed_items:
+        if m.get_content() not in self.committed_item_set:
             self.send_message(Message(self.get_name(),m.get_exp(),MessagePerformative.COMMIT,m.get_content()))
-            self.committed_items.append(m.get_content())
+            self.commit_item(m.get_content())
         else:
             self.propose_preferred_item(m.get_exp())
 
@@ -71,7 +201,7 @@ class ArgumentAgent(CommunicatingAgent):
     def handle_ask_why_message(self,m):
         argument = self.preference.support_proposal(m.get_content())
         if argument:
-            self.arguments_used.append(argument)
+            self.arguments_used.add(argument)
             self.send_message(Message(self.get_name(),m.get_exp(),MessagePerformative.ARGUE,argument))
         else:
             self.rejected_items.add(m.get_content())
@@ -80,12 +210,13 @@ class ArgumentAgent(CommunicatingAgent):
 
     def handle_argue_message(self,m):
         incoming_argument = m.get_content()
-        selectable_items = list(self.items.difference(set(self.committed_items)).difference(self.rejected_items))
-        arguments = self.preference.get_attacking_arguments(selectable_items, incoming_argument)
-        arguments = list(filter(lambda arg: arg not in self.arguments_used,arguments))
+        arguments = self.preference.get_attacking_arguments(SelectableItems(self), incoming_argument)
+        arguments = [argument for argument in arguments if argument not in self.arguments_used]
+        if self.profiler is not None:
+            self.profiler.record_candidate_size(len(arguments))
         if len(arguments) > 0:
             argument = self.model.random.choice(arguments)
-            self.arguments_used.append(argument)
+            self.arguments_used.add(argument)
             self.send_message(Message(self.get_name(),m.get_exp(),MessagePerformative.ARGUE,argument ))
         else:
             item, decision,_,_ = incoming_argument.parse()
@@ -106,17 +237,21 @@ class ArgumentAgent(CommunicatingAgent):
     def step(self):
         super().step()
         messages = self.get_new_messages()
-        handlers={
-                MessagePerformative.PROPOSE:self.handle_propose_message,
-                MessagePerformative.ASK_WHY:self.handle_ask_why_message,
-                MessagePerformative.ACCEPT: self.handle_accept_message,
-                MessagePerformative.COMMIT: self.handle_commit_message,
-                MessagePerformative.ARGUE: self.handle_argue_message,
-                MessagePerformative.TERMINATE: self.handle_terminate_message,
-                  MessagePerformative.DONT_KNOW: self.handle_dont_know_message,
-            }
+        if self.profiler is None:
+            for m in messages:
+                self.get_handler(m)(self, m)
+        else:
+            self.__profile_messages(messages)
+
+    def __profile_messages(self, messages):
+        """ Handle the messages, timing each handler with the profiler.
+        """
+        message_service = MessageService.get_instance(self.model)
         for m in messages:
-            handlers[m.get_performative()](m)
+            handler = self.get_handler(m)
+            self.profiler.start(handler.__name__, message_service.get_sent_count())
+            handler(self, m)
+            self.profiler.stop(message_service.get_sent_count())
 
 
     def get_preference(self):
@@ -124,40 +259,201 @@ class ArgumentAgent(CommunicatingAgent):
 
     def generate_random_preferences(self, item):
         self.items.add(item)
+        self.candidates = None
         for criterion in self.preference.get_criterion_name_list():
-            value = self.model.random.choice(list(Value))
+            value = self.model.random.choice(VALUES)
             self.preference.add_criterion_value(CriterionValue(item,criterion,value))
 
+    def generate_random_preference_matrix(self, items):
+        """ Draw the values of all the items for the criteria of the agent at once, with the numpy generator
+        of the model.
+        """
+        criterions = self.preference.get_criterion_name_list()
+        values = self.model.np_random.integers(len(VALUES), size=(len(items), len(criterions)), dtype=np.int8)
+        self.set_preferences(items, criterions, values)
+
+    def use_catalog(self, catalog, value_matrix):
+        """ Negotiate over the items of an ItemCatalog, with the value matrix of the agent in this catalog.
+        """
+        self.items = catalog
+        self.candidates = None
+        self.preference.set_catalog(catalog, value_matrix)
+
+    def set_preferences(self, items, criterion_names, values):
+        """ Set the values of the items for the criteria of the agent, from an (item x criterion) array of value
+        numbers whose columns follow criterion_names. The columns of other criteria are ignored.
+        """
+        criterions = self.preference.get_criterion_name_list()
+        for criterion in criterions:
+            if criterion not in criterion_names:
+                raise Exception("No values for the criterion " + criterion.name + "!")
+        columns = [criterion_names.index(criterion) for criterion in criterions]
+        self.items.update(items)
+        self.candidates = None
+        self.preference.set_criterion_values(items, criterions, np.asarray(values)[:, columns])
+
+class TerminationReason(Enum):
+    """TerminationReason enum class.
+    Enumeration containing the reasons why ArgumentModel.run stopped.
+    """
+    HALTED = 1
+    MAX_STEPS = 2
+    TIMEOUT = 3
+    STALLED = 4
+    CYCLE = 5
+
+
 class ArgumentModel(Model):
     """ ArgumentModel which inherit from Model.
+    Each agent accepts the proposed items among its acceptance_percent best items.
+    The mailboxes keep every message they read, unless retention_policy gives the RetentionPolicy of each agent
+    from its name. close releases the resources of these policies, such as their log files.
+    Messages are not traced unless a trace sink is given, and handlers are not profiled unless a profiler is given.
+    The agents are instances of agent_class, and follow ARGUMENT_PROTOCOL unless another protocol is given.
+    The values of the items are drawn at random for each agent in one vectorized draw, reproducible from the
+    seed, unless preference_files gives, for each agent, a .npy or CSV file of nb_items rows of values.
+    An ItemCatalog, or its directory, can give both the items and the value matrices of the agents, by name.
+    The criterion orders of the agents are shuffled unless criterion_orders gives them, and the whole negotiation
+    is reproducible from the seed. A model restored from a snapshot is created without items and without
+    starting its first round.
+
+    nb_agents agents negotiate over a shared catalog of items, two by two:
+        pairwise: the agents are split into fixed pairs which negotiate at the same time
+        round_robin: every agent negotiates with every other one, in rounds of simultaneous pairs
+    The model counts the agents which voted to halt, so that detecting the end of a round does not
+    require going through all the agents.
     """
-    def __init__(self,nb_items):
+    PAIRINGS = ("pairwise", "round_robin")
+    agent_class = ArgumentAgent
+
+    def __init__(self,nb_items,trace_sink=None,seed=None,criterion_orders=None,nb_agents=2,pairing="pairwise",
+                 profiler=None,protocol=None,preference_files=None,catalog=None,start=True,acceptance_percent=10,
+                 retention_policy=None):
+        if nb_agents < 2:
+            raise Exception("Negotiations need at least two agents!")
+        # mesa stores the random generator on the class, which models living in the same process would share
+        self.random = random.Random(seed)
         self.schedule = RandomActivation(self)
         self.__messages_service = MessageService(self.schedule)
+        self.__messages_service.set_trace_sink(trace_sink)
         self.next_id = 0
         self.step_index = 0
-        criterions = [CriterionName.ENVIRONMENT_IMPACT, CriterionName.NOISE, CriterionName.CONSUMPTION, CriterionName.DURABILITY,CriterionName.PRODUCTION_COST ]
-        self.random.shuffle(criterions)
-        self.agent1 = ArgumentAgent(self.get_next_id(),self, "agent1",criterions)
-        self.random.shuffle(criterions)
-        self.agent2 = ArgumentAgent(self.get_next_id(),self, "agent2",criterions)
-
-        items = [Item("Item{}".format(self.get_next_id()), "Some random item") for _ in range(nb_items)]
-
-        for item in items:
-            self.agent1.generate_random_preferences(item)
-            self.agent2.generate_random_preferences(item)
-        
-        self.schedule.add(self.agent1)
-        self.schedule.add(self.agent2)
+        self.halted_count = 0
+        self.termination_reason = None
+        if criterion_orders is None:
+            criterions = [CriterionName.ENVIRONMENT_IMPACT, CriterionName.NOISE, CriterionName.CONSUMPTION, CriterionName.DURABILITY,CriterionName.PRODUCTION_COST ]
+            criterion_orders = []
+            for _ in range(nb_agents):
+                self.random.shuffle(criterions)
+                criterion_orders.append(list(criterions))
+        self.np_random = np.random.default_rng(self.random.getrandbits(64))
+        names = ["agent{}".format(i + 1) for i in range(nb_agents)]
+        self.agents = [self.agent_class(self.get_next_id(),self,names[i],criterion_orders[i],
+                                         acceptance_percent=acceptance_percent,protocol=protocol,
+                                         retention_policy=retention_policy(names[i]) if retention_policy else None)
+                       for i in range(nb_agents)]
+        for agent in self.agents:
+            agent.profiler = profiler
+        self.agent1 = self.agents[0]
+        self.agent2 = self.agents[1]
+
+        if catalog is not None:
+            if not isinstance(catalog, ItemCatalog):
+                catalog = ItemCatalog(catalog)
+            if len(catalog) != nb_items:
+                raise Exception("Expected " + str(nb_items) + " items in the catalog, not " + str(len(catalog)) + "!")
+            self.items = catalog
+            for agent in self.agents:
+                agent.use_catalog(catalog, catalog.open_value_matrix(agent.get_name()))
+        else:
+            self.items = [Item("Item{}".format(item_id), "Some random item")
+                          for item_id in range(self.next_id + 1, self.next_id + 1 + nb_items)]
+            self.next_id += nb_items
+            for i, agent in enumerate(self.agents):
+                if preference_files is None:
+                    agent.generate_random_preference_matrix(self.items)
+                else:
+                    criterion_names, values = Preferences.load_criterion_values(preference_files[i])
+                    if len(values) != nb_items:
+                        raise Exception("Expected " + str(nb_items) + " items in " + preference_files[i] + "!")
+                    agent.set_preferences(self.items, criterion_names, values)
+
+        for agent in self.agents:
+            self.schedule.add(agent)
         self.running = True
 
-        self.agent1.propose_preferred_item("agent2")
+        self.pairing = pairing
+        self.rounds = self.__get_rounds(pairing)
+        self.round_index = 0
+        if start:
+            self.start_round()
+
+    def __get_rounds(self, pairing):
+        """ Return the pairs of agents negotiating together, round by round.
+        """
+        if pairing == "pairwise":
+            if len(self.agents) % 2 != 0:
+                raise Exception("Pairwise negotiations need an even number of agents!")
+            return [[(self.agents[i], self.agents[i + 1]) for i in range(0, len(self.agents), 2)]]
+        if pairing == "round_robin":
+            # Circle method: the first agent stays in place while the others rotate, None is a bye
+            agents = self.agents + [None] if len(self.agents) % 2 != 0 else list(self.agents)
+            rounds = []
+            for _ in range(len(agents) - 1):
+                pairs = [(agents[i], agents[len(agents) - 1 - i]) for i in range(len(agents) // 2)]
+                rounds.append([pair for pair in pairs if None not in pair])
+                agents = [agents[0], agents[-1]] + agents[1:-1]
+            return rounds
+        raise Exception("Unknown pairing " + str(pairing) + ", expected one of " + ", ".join(self.PAIRINGS))
+
+    def start_round(self):
+        """ Start the negotiations of the current round, agents without a partner vote to halt at once.
+        """
+        for agent in self.agents:
+            agent.start_session()
+        paired_agents = set()
+        for first_agent, second_agent in self.rounds[self.round_index]:
+            paired_agents.update([first_agent, second_agent])
+        for agent in self.agents:
+            if agent not in paired_agents:
+                agent.vote_to_halt = True
+        for first_agent, second_agent in self.rounds[self.round_index]:
+            first_agent.propose_preferred_item(second_agent.get_name())
+
+    def count_vote_to_halt(self, change):
+        """ Update the number of agents which voted to halt (called by the agents).
+        """
+        self.halted_count += change
+
+    def is_finished(self):
+        """ Return whether every agent voted to halt in the last round.
+        """
+        return self.halted_count == len(self.agents) and self.round_index == len(self.rounds) - 1
 
     def step(self):
         self.step_index += 1
         self.__messages_service.dispatch_messages()
         self.schedule.step()
+        if self.halted_count == len(self.agents) and self.round_index < len(self.rounds) - 1:
+            self.round_index += 1
+            self.start_round()
+
+    def save_catalog(self, path):
+        """ Write the items of the model and the value matrix of each agent to a new ItemCatalog and return it.
+        """
+        catalog = ItemCatalog.create(path, [item.get_name() for item in self.items],
+                                     [item.get_description() for item in self.items])
+        for agent in self.agents:
+            if list(agent.preference.get_items()) != list(self.items):
+                raise Exception("The items of " + agent.get_name() + " are not the items of the model!")
+            catalog.save_value_matrix(agent.get_name(), agent.preference.get_value_matrix())
+        return catalog
+
+    def close(self):
+        """ Release the resources of the mailboxes of the agents.
+        """
+        for agent in self.agents:
+            agent.close()
 
     def get_next_id(self):
         self.next_id += 1
@@ -167,27 +463,100 @@ class ArgumentModel(Model):
         for _ in range(n):
             self.step()
     
-    def run(self):
-        while not self.agent1.vote_to_halt or not self.agent2.vote_to_halt:
+    def run(self, max_steps=None, max_seconds=None, max_silent_steps=1, cycle_window=1000):
+        """ Run the negotiation until every agent halts or one of the bounds is reached, and return why it
+        stopped as a TerminationReason, which is also kept in termination_reason.
+
+        :param max_steps: the maximum number of steps of this call, None for no limit
+        :param max_seconds: the maximum wall-clock duration of this call, None for no limit
+        :param max_silent_steps: the number of consecutive steps in which no message was sent nor pending
+            after which the negotiation is stalled, None to never stop on silence
+        :param cycle_window: the number of consecutive steps in which messages flow without any change of
+            the state of the agents after which the negotiation is in a cycle, None to never stop on cycles
+        """
+        message_service = self.__messages_service
+        start_time = time.perf_counter()
+        step_count = 0
+        silent_steps = 0
+        unchanged_steps = 0
+        state = self.get_state()
+        while not self.is_finished():
+            if max_steps is not None and step_count >= max_steps:
+                self.termination_reason = TerminationReason.MAX_STEPS
+                return self.termination_reason
+            if max_seconds is not None and time.perf_counter() - start_time >= max_seconds:
+                self.termination_reason = TerminationReason.TIMEOUT
+                return self.termination_reason
+            sent_count = message_service.get_sent_count()
             self.step()
+            step_count += 1
+            if self.is_finished():
+                break
+            if message_service.get_sent_count() == sent_count and message_service.get_pending_count() == 0:
+                silent_steps += 1
+                if max_silent_steps is not None and silent_steps >= max_silent_steps:
+                    self.termination_reason = TerminationReason.STALLED
+                    return self.termination_reason
+            else:
+                silent_steps = 0
+            if cycle_window is not None:
+                previous_state, state = state, self.get_state()
+                unchanged_steps = unchanged_steps + 1 if state == previous_state else 0
+                if unchanged_steps >= cycle_window:
+                    self.termination_reason = TerminationReason.CYCLE
+                    return self.termination_reason
+        self.termination_reason = TerminationReason.HALTED
+        return self.termination_reason
+
+    def get_state(self):
+        """ Return the progress of the negotiation: the round and, for each agent, its numbers of committed
+        items, rejected items and arguments used, and its vote. It only stays the same while nothing is decided.
+        """
+        return (self.round_index,) + tuple([(len(agent.committed_items), len(agent.rejected_items),
+                                             len(agent.arguments_used), agent.vote_to_halt)
+                                            for agent in self.agents])
+
+    def get_stats(self):
+        """ Return the statistics of the negotiation: the number of steps and, for each agent, its victories,
+        the rate of its propositions which were accepted and the ratio between the mean score of the committed
+        items and the mean score of all the items. Rates and ratios are None when they are undefined, and the
+        termination reason is None until run returns.
+        """
+        agents_stats = []
+        for agent in self.agents:
+            committed_items = agent.get_all_committed_items()
+            acceptance_rate = agent.accepted_propositions/agent.propositions if agent.propositions > 0 else None
+            mean_scores_ratio = None
+            if len(committed_items) > 0:
+                # The scores of all the items are read at once, without creating the items of a catalog
+                mean_scores_ratio = np.mean([item.get_score(agent.preference) for item in committed_items])/np.mean(agent.preference.get_scores())
+            agents_stats.append({"name": agent.get_name(),
+                                 "victories": agent.victory_count,
+                                 "acceptance_rate": acceptance_rate,
+                                 "committed_score_ratio": mean_scores_ratio,
+                                 "nb_committed_items": len(committed_items)})
+        return {"steps": self.step_index,
+                "termination_reason": self.termination_reason.name if self.termination_reason is not None else None,
+                "nb_items": len(self.agent1.items),
+                "agents": agents_stats}
 
     def show_stats(self):
+        stats = self.get_stats()
         print()
-        print("Number of steps to converge: {0} for {1} items".format(self.step_index,len(self.agent1.items)))
+        print("Number of steps to converge: {0} for {1} items".format(stats["steps"],stats["nb_items"]))
         print()
-        for agent in [self.agent1,self.agent2]: 
-            print("Stats for: ",agent.get_name())
-            print("Victories: ", agent.victory_count)
-            print("Acceptation rate: ", agent.accepted_propositions/agent.propositions)
-            mean_scores_ratio = np.mean([item.get_score(agent.preference) for item in agent.committed_items])/np.mean([item.get_score(agent.preference) for item in agent.items])
-            print("Committed items mean score ratio: ",mean_scores_ratio)
+        for agent_stats in stats["agents"]:
+            print("Stats for: ",agent_stats["name"])
+            print("Victories: ", agent_stats["victories"])
+            print("Acceptation rate: ", agent_stats["acceptance_rate"])
+            print("Committed items mean score ratio: ",agent_stats["committed_score_ratio"])
             print()
 
 
 
 
 if __name__ == "__main__":
-    argument_model = ArgumentModel(100)
+    argument_model = ArgumentModel(100, ConsoleTraceSink())
     argument_model.run()
     argument_model.show_stats()
 
@@ -0,0 +1,282 @@
+#!/usr/bin/env python3
+"""
+Snapshots of ArgumentModel negotiations, to checkpoint long runs and to branch from a state of a negotiation.
+
+A snapshot holds the whole state needed to go on with the negotiation:
+- the items and the preferences of the agents, or the directory of their ItemCatalog;
+- the state of each agent;
+- the unread messages of each agent;
+- the deferred messages and the counters of the message service;
+- the states of the random generators.
+Read messages kept by the mailboxes are left out, as the negotiation never reads them again.
+Trace sinks, profilers, protocols and retention policies are not part of the state and are given again on restore.
+
+Example, from the mesa directory:
+    model = ArgumentModel(1000, seed=1)
+    model.run(max_steps=500)
+    write_snapshot(model, "checkpoint.snap")
+    branch = read_snapshot("checkpoint.snap")
+    branch.run()
+"""
+
+import json
+
+from communication.arguments.Argument import Argument
+from communication.arguments.Comparison import Comparison
+from communication.arguments.CoupleValue import CoupleValue
+from communication.message.Message import Message
+from communication.message.MessagePerformative import MessagePerformative
+from communication.message.MessageService import MessageService
+from communication.preferences.CriterionName import CriterionName
+from communication.preferences.Item import Item
+from communication.preferences.ItemCatalog import ItemCatalog
+from communication.preferences.Value import Value
+from communication.snapshot.SnapshotReader import SnapshotReader
+from communication.snapshot.SnapshotWriter import SnapshotWriter
+from pw_argumentation import ArgumentModel, TerminationReason
+
+
+MAGIC = b"ARGMODEL"
+VERSION = 1
+
+COUNTERS = ["sent", "queued", "delivered", "pending"]
+
+NO_CONTENT, ITEM_CONTENT, ARGUMENT_CONTENT, ITEM_LIST_CONTENT, STR_CONTENT = range(5)
+
+
+def save_snapshot(model):
+    """ Return a snapshot of the state of the model, between two steps, as bytes.
+    """
+    writer = SnapshotWriter(MAGIC, VERSION)
+    item_indexes = _ItemIndexes(model.items)
+
+    writer.write_uint(len(model.agents))
+    writer.write_str(model.pairing)
+    for agent in model.agents:
+        writer.write_uints([criterion.value for criterion in agent.preference.get_criterion_name_list()])
+        writer.write_uint(agent.acceptance_percent)
+
+    catalog_path = model.items.get_path() if isinstance(model.items, ItemCatalog) else None
+    writer.write_bool(catalog_path is not None)
+    if catalog_path is not None:
+        writer.write_str(catalog_path)
+        writer.write_uint(len(model.items))
+    else:
+        writer.write_strs([item.get_name() for item in model.items])
+        writer.write_strs([item.get_description() for item in model.items])
+        for agent in model.agents:
+            columns = [criterion.value for criterion in agent.preference.get_criterion_name_list()]
+            writer.write_array(agent.preference.get_value_matrix()[:, columns])
+
+    writer.write_uint(model.step_index)
+    writer.write_uint(model.next_id)
+    writer.write_uint(model.round_index)
+    writer.write_optional_uint(model.termination_reason.value if model.termination_reason is not None else None)
+    writer.write_uint(model.schedule.steps)
+    writer.write_uint(model.schedule.time)
+    version, internal_state, gauss_next = model.random.getstate()
+    writer.write_uint(version)
+    writer.write_uints(internal_state)
+    writer.write_bool(gauss_next is not None)
+    if gauss_next is not None:
+        writer.write_float(gauss_next)
+    writer.write_str(json.dumps(model.np_random.bit_generator.state))
+
+    for agent in model.agents:
+        writer.write_uints([item_indexes.get(item) for item in agent.previous_committed_items])
+        writer.write_uints([item_indexes.get(item) for item in agent.committed_items])
+        writer.write_uints(sorted([item_indexes.get(item) for item in agent.rejected_items]))
+        writer.write_uint(len(agent.arguments_used))
+        for argument in agent.arguments_used:
+            _write_argument(writer, argument, item_indexes)
+        writer.write_uints([agent.victory_count, agent.propositions, agent.accepted_propositions,
+                            agent.unexpected_message_count])
+        writer.write_bool(agent.is_proposed_by_me)
+        writer.write_bool(agent.vote_to_halt)
+        writer.write_uint(len(agent.dialogue_states))
+        for partner, performative in agent.dialogue_states.items():
+            writer.write_str(partner)
+            writer.write_uint(performative.value)
+        _write_messages(writer, agent.get_unread_messages(), item_indexes)
+
+    agent_indexes = {agent: index for index, agent in enumerate(model.agents)}
+    state = MessageService.get_instance(model).get_state()
+    writer.write_bool(state["instant_delivery"])
+    writer.write_uint(state["sent_count"])
+    writer.write_uints([state["step_counters"][counter] for counter in COUNTERS])
+    writer.write_uints([state["last_step_counters"][counter] for counter in COUNTERS])
+    writer.write_uint(len(state["pending_messages"]))
+    for agent, messages in state["pending_messages"].items():
+        writer.write_uint(agent_indexes[agent])
+        _write_messages(writer, messages, item_indexes)
+    return writer.get_snapshot()
+
+
+def restore_snapshot(snapshot, trace_sink=None, profiler=None, protocol=None, retention_policy=None):
+    """ Return a new model in the state saved in the snapshot, ready to go on with the negotiation.
+    """
+    reader = SnapshotReader(snapshot, MAGIC, [VERSION])
+
+    nb_agents = reader.read_uint()
+    pairing = reader.read_str()
+    criterion_orders = []
+    acceptance_percents = []
+    for _ in range(nb_agents):
+        criterion_orders.append([CriterionName(value) for value in reader.read_uints()])
+        acceptance_percents.append(reader.read_uint())
+    model = ArgumentModel(0, criterion_orders=criterion_orders, nb_agents=nb_agents, pairing=pairing,
+                          profiler=profiler, protocol=protocol, start=False, retention_policy=retention_policy)
+    for agent, acceptance_percent in zip(model.agents, acceptance_percents):
+        agent.acceptance_percent = acceptance_percent
+
+    if reader.read_bool():
+        catalog = ItemCatalog(reader.read_str())
+        if len(catalog) != reader.read_uint():
+            raise Exception("The catalog " + catalog.get_path() + " changed since the snapshot!")
+        model.items = catalog
+        for agent in model.agents:
+            agent.use_catalog(catalog, catalog.open_value_matrix(agent.get_name()))
+    else:
+        names = reader.read_strs()
+        descriptions = reader.read_strs()
+        model.items = [Item(name, description) for name, description in zip(names, descriptions)]
+        for agent in model.agents:
+            agent.set_preferences(model.items, agent.preference.get_criterion_name_list(), reader.read_array())
+
+    model.step_index = reader.read_uint()
+    model.next_id = reader.read_uint()
+    model.round_index = reader.read_uint()
+    termination_reason = reader.read_optional_uint()
+    model.termination_reason = TerminationReason(termination_reason) if termination_reason is not None else None
+    model.schedule.steps = reader.read_uint()
+    model.schedule.time = reader.read_uint()
+    version = reader.read_uint()
+    internal_state = tuple(reader.read_uints())
+    gauss_next = reader.read_float() if reader.read_bool() else None
+    model.random.setstate((version, internal_state, gauss_next))
+    model.np_random.bit_generator.state = json.loads(reader.read_str())
+
+    for agent in model.agents:
+        agent.previous_committed_items = [model.items[index] for index in reader.read_uints()]
+        for index in reader.read_uints():
+            agent.commit_item(model.items[index])
+        agent.rejected_items = set([model.items[index] for index in reader.read_uints()])
+        agent.arguments_used = set([_read_argument(reader, model.items) for _ in range(reader.read_uint())])
+        agent.victory_count, agent.propositions, agent.accepted_propositions, agent.unexpected_message_count = \
+            reader.read_uints()
+        agent.is_proposed_by_me = reader.read_bool()
+        agent.vote_to_halt = reader.read_bool()
+        for _ in range(reader.read_uint()):
+            partner = reader.read_str()
+            agent.dialogue_states[partner] = MessagePerformative(reader.read_uint())
+        agent.receive_message_batch(_read_messages(reader, model.items))
+
+    message_service = MessageService.get_instance(model)
+    state = {"instant_delivery": reader.read_bool(),
+             "sent_count": reader.read_uint(),
+             "step_counters": dict(zip(COUNTERS, reader.read_uints())),
+             "last_step_counters": dict(zip(COUNTERS, reader.read_uints())),
+             "pending_messages": {}}
+    for _ in range(reader.read_uint()):
+        agent = model.agents[reader.read_uint()]
+        state["pending_messages"][agent] = _read_messages(reader, model.items)
+    message_service.set_state(state)
+    message_service.set_trace_sink(trace_sink)
+    return model
+
+
+def write_snapshot(model, path):
+    """ Write a snapshot of the state of the model to a file.
+    """
+    with open(path, "wb") as snapshot_file:
+        snapshot_file.write(save_snapshot(model))
+
+
+def read_snapshot(path, trace_sink=None, profiler=None, protocol=None, retention_policy=None):
+    """ Return a new model in the state saved in a snapshot file.
+    """
+    with open(path, "rb") as snapshot_file:
+        return restore_snapshot(snapshot_file.read(), trace_sink, profiler, protocol, retention_policy)
+
+
+class _ItemIndexes:
+    """ Index of each item of a model in model.items, which is the id of the items of a catalog.
+    """
+    def __init__(self, items):
+        self.__items = items
+        self.__indexes = None
+
+    def get(self, item):
+        if isinstance(self.__items, ItemCatalog):
+            return item.get_id()
+        if self.__indexes is None:
+            self.__indexes = {item: index for index, item in enumerate(self.__items)}
+        return self.__indexes[item]
+
+
+def _write_argument(writer, argument, item_indexes):
+    item, decision, couple_value, comparison = argument.parse()
+    criterion, value = couple_value.parse()
+    writer.write_bool(decision)
+    writer.write_uint(item_indexes.get(item))
+    writer.write_uints([criterion.value, value.value])
+    writer.write_bool(comparison is not None)
+    if comparison is not None:
+        writer.write_uints([criterion.value for criterion in comparison.parse()])
+
+
+def _read_argument(reader, items):
+    decision = reader.read_bool()
+    item = items[reader.read_uint()]
+    criterion, value = reader.read_uints()
+    comparison = None
+    if reader.read_bool():
+        best_criterion, worst_criterion = reader.read_uints()
+        comparison = Comparison(CriterionName(best_criterion), CriterionName(worst_criterion))
+    return Argument(decision, item, CoupleValue(CriterionName(criterion), Value(value)), comparison)
+
+
+def _write_messages(writer, messages, item_indexes):
+    writer.write_uint(len(messages))
+    for message in messages:
+        writer.write_str(message.get_exp())
+        writer.write_str(message.get_dest())
+        writer.write_uint(message.get_performative().value)
+        content = message.get_content()
+        if content is None:
+            writer.write_uint(NO_CONTENT)
+        elif isinstance(content, Item):
+            writer.write_uint(ITEM_CONTENT)
+            writer.write_uint(item_indexes.get(content))
+        elif isinstance(content, Argument):
+            writer.write_uint(ARGUMENT_CONTENT)
+            _write_argument(writer, content, item_indexes)
+        elif isinstance(content, list) and all(isinstance(item, Item) for item in content):
+            writer.write_uint(ITEM_LIST_CONTENT)
+            writer.write_uints([item_indexes.get(item) for item in content])
+        elif isinstance(content, str):
+            writer.write_uint(STR_CONTENT)
+            writer.write_str(content)
+        else:
+            raise Exception("Cannot save the content of the message " + message.to_string(False) + "!")
+
+
+def _read_messages(reader, items):
+    messages = []
+    for _ in range(reader.read_uint()):
+        exp = reader.read_str()
+        dest = reader.read_str()
+        performative = MessagePerformative(reader.read_uint())
+        content_type = reader.read_uint()
+        if content_type == NO_CONTENT:
+            content = None
+        elif content_type == ITEM_CONTENT:
+            content = items[reader.read_uint()]
+        elif content_type == ARGUMENT_CONTENT:
+            content = _read_argument(reader, items)
+        elif content_type == ITEM_LIST_CONTENT:
+            content = [items[index] for index in reader.read_uints()]
+        else:
+            content = reader.read_str()
+        messages.append(Message(exp, dest, performative, content))
+    return messages
@@ -0,0 +1,177 @@
+#!/usr/bin/env python3
+"""
+Parameter sweeps of ArgumentModel negotiations, run across a pool of processes.
+
+Example, from the mesa directory:
+    python pw_sweep.py --nb-items 10 100 1000 --seeds 0-99 --output results.csv
+"""
+
+import argparse
+import csv
+import itertools
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+from communication.mailbox.CountsOnlyRetentionPolicy import CountsOnlyRetentionPolicy
+from communication.mailbox.RingBufferRetentionPolicy import RingBufferRetentionPolicy
+from communication.preferences.CriterionName import CriterionName
+from communication.preferences.ItemCatalog import ItemCatalog
+from communication.preferences.SharedItemCatalog import SharedItemCatalog
+from pw_argumentation import ArgumentModel
+
+
+METRICS = ["nb_items", "seed", "criterion_orders", "acceptance_percent", "steps", "termination_reason",
+           "nb_committed_items",
+           "agent1_victories", "agent1_acceptance_rate", "agent1_committed_score_ratio",
+           "agent2_victories", "agent2_acceptance_rate", "agent2_committed_score_ratio"]
+
+
+def format_criterion_orders(criterion_orders):
+    """ Return criterion orders as a string, e.g. "NOISE,CONSUMPTION/CONSUMPTION,NOISE", or "random".
+    """
+    if criterion_orders is None:
+        return "random"
+    return "/".join([",".join([criterion.name for criterion in order]) for order in criterion_orders])
+
+
+def parse_criterion_orders(text):
+    """ Return the criterion orders of the two agents from a string written by format_criterion_orders.
+    """
+    if text == "random":
+        return None
+    return tuple([[CriterionName[name] for name in order.split(",")] for order in text.split("/")])
+
+
+def get_retention_policy_factory(text):
+    """ Return the function giving the retention policy of each agent from a string: "all" to keep every
+    read message, "counts" to only count them, or "ring:N" to keep the last N.
+    """
+    if text == "all":
+        return None
+    if text == "counts":
+        return lambda name: CountsOnlyRetentionPolicy()
+    if text.startswith("ring:"):
+        size = int(text[len("ring:"):])
+        return lambda name: RingBufferRetentionPolicy(size)
+    raise Exception("Unknown retention " + text + ', expected "all", "counts" or "ring:N"')
+
+
+def run_negotiation(nb_items, seed, criterion_orders=None, max_steps=None, max_seconds=None, catalog=None,
+                    retention="all", acceptance_percent=10):
+    """ Run one negotiation until both agents halt, or it reaches a bound, and return its metrics as a flat dict.
+    """
+    model = ArgumentModel(nb_items, seed=seed, criterion_orders=criterion_orders, catalog=catalog,
+                          acceptance_percent=acceptance_percent,
+                          retention_policy=get_retention_policy_factory(retention))
+    try:
+        model.run(max_steps=max_steps, max_seconds=max_seconds)
+    finally:
+        model.close()
+    stats = model.get_stats()
+    result = {"nb_items": nb_items,
+              "seed": seed,
+              "criterion_orders": format_criterion_orders(criterion_orders),
+              "acceptance_percent": acceptance_percent,
+              "steps": stats["steps"],
+              "termination_reason": stats["termination_reason"],
+              "nb_committed_items": stats["agents"][0]["nb_committed_items"]}
+    for agent_stats in stats["agents"]:
+        for metric in ["victories", "acceptance_rate", "committed_score_ratio"]:
+            result[agent_stats["name"] + "_" + metric] = agent_stats[metric]
+    return result
+
+
+def _run_negotiation(parameters):
+    return run_negotiation(*parameters)
+
+
+def run_sweep(nb_items_list, seeds, criterion_orders_list=(None,), processes=None, max_steps=None, max_seconds=None,
+              catalog=None, shared_catalog=False, acceptance_percents=(10,), retention="all"):
+    """ Run a negotiation for every combination of the parameters on a pool of processes.
+    Results are returned in the order of the combinations, whatever the order in which they complete.
+
+    :param criterion_orders_list: the criterion orders of the two agents to try, None for random orders
+    :param processes: the number of processes, all the cores by default
+    :param max_steps: the maximum number of steps of each negotiation, None for no limit
+    :param max_seconds: the maximum wall-clock duration of each negotiation, None for no limit
+    :param catalog: the directory of an ItemCatalog of nb_items items, shared by the processes instead of
+        drawing the values of the items
+    :param shared_catalog: whether to publish the catalog in shared memory once for all the processes,
+        rather than have each process map its files
+    :param acceptance_percents: the percentages of their best items which the agents accept, to try
+    :param retention: the read messages kept by the mailboxes, see get_retention_policy_factory
+    :return: list of dicts of metrics, one per negotiation
+    """
+    if catalog is not None and shared_catalog:
+        catalog = SharedItemCatalog.publish(ItemCatalog(catalog))
+    combinations = list(itertools.product(nb_items_list, seeds, criterion_orders_list, [max_steps], [max_seconds],
+                                          [catalog], [retention], acceptance_percents))
+    processes = processes or os.cpu_count()
+    try:
+        if processes == 1:
+            return [_run_negotiation(combination) for combination in combinations]
+        chunksize = max(1, len(combinations) // (4 * processes))
+        with ProcessPoolExecutor(processes) as executor:
+            return list(executor.map(_run_negotiation, combinations, chunksize=chunksize))
+    finally:
+        if isinstance(catalog, SharedItemCatalog):
+            catalog.unlink()
+
+
+def write_csv(results, path):
+    """ Write the results of a sweep to a CSV file.
+    """
+    with open(path, "w", newline="") as csv_file:
+        writer = csv.DictWriter(csv_file, fieldnames=METRICS)
+        writer.writeheader()
+        writer.writerows(results)
+
+
+def write_parquet(results, path):
+    """ Write the results of a sweep to a Parquet file, which needs pandas and pyarrow (or fastparquet).
+    """
+    import pandas as pd
+    pd.DataFrame(results, columns=METRICS).to_parquet(path, index=False)
+
+
+def parse_seeds(texts):
+    """ Return the seeds given as integers or inclusive ranges such as 0-99.
+    """
+    seeds = []
+    for text in texts:
+        if "-" in text:
+            first, last = text.split("-")
+            seeds.extend(range(int(first), int(last) + 1))
+        else:
+            seeds.append(int(text))
+    return seeds
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Run a sweep of ArgumentModel negotiations.")
+    parser.add_argument("--nb-items", type=int, nargs="+", default=[100])
+    parser.add_argument("--seeds", nargs="+", default=["0-9"], help="seeds or inclusive ranges, e.g. 0-99")
+    parser.add_argument("--criterion-orders", nargs="+", default=["random"],
+                        help='"random" or the orders of both agents, e.g. NOISE,CONSUMPTION/CONSUMPTION,NOISE')
+    parser.add_argument("--acceptance-percents", type=int, nargs="+", default=[10],
+                        help="percentages of their best items which the agents accept")
+    parser.add_argument("--retention", default="all",
+                        help='read messages kept by the mailboxes: "all", "counts" or "ring:N"')
+    parser.add_argument("--processes", type=int, default=None)
+    parser.add_argument("--max-steps", type=int, default=None, help="step budget of each negotiation")
+    parser.add_argument("--max-seconds", type=float, default=None, help="time budget of each negotiation")
+    parser.add_argument("--catalog", default=None, help="directory of an item catalog to negotiate over")
+    parser.add_argument("--shared-catalog", action="store_true",
+                        help="publish the catalog in shared memory once for all the processes")
+    parser.add_argument("--output", default="sweep.csv", help="a .csv or .parquet file")
+    args = parser.parse_args()
+
+    results = run_sweep(args.nb_items, parse_seeds(args.seeds),
+                        [parse_criterion_orders(text) for text in args.criterion_orders], args.processes,
+                        args.max_steps, args.max_seconds, args.catalog, args.shared_catalog,
+                        args.acceptance_percents, args.retention)
+    if args.output.endswith(".parquet"):
+        write_parquet(results, args.output)
+    else:
+        write_csv(results, args.output)
+    print("{0} negotiations written to {1}".format(len(results), args.output))